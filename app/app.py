@@ -1,23 +1,68 @@
+import contextlib
+import uuid
 import streamlit as st
 from config import configure_page
-from sidebar import create_sidebar
+from sidebar import create_sidebar, create_refresh_status, get_perf_recorder, create_performance_panel
 from tabs import create_tabs
 from utils.tim import InvestmentAnalyzer
+from utils.registry import get_dataset
+from utils.watcher import watch_file, unwatch
+from utils.perf import span
 
 def main():
     """Main application entry point"""
+    # Spans are only recorded while the Performance panel is enabled
+    recorder = get_perf_recorder()
+    with recorder.rerun() if recorder is not None else contextlib.nullcontext():
+        run_app()
+    if recorder is not None:
+        create_performance_panel(recorder)
+
+def update_watch(config):
+    """Subscribe the session to the watcher of its file, releasing the one it used before"""
+    session_id = st.session_state.setdefault('session_id', uuid.uuid4().hex)
+    watched = (config['file_path'], config['memory_map']) if config['auto_refresh'] else None
+    previous = st.session_state.get('watched_file')
+    if previous is not None and previous != watched:
+        unwatch(*previous, session_id)
+    st.session_state.watched_file = watched
+    if watched is None:
+        return None
+    return watch_file(
+        config['file_path'], 
+        memory_map=config['memory_map'], 
+        incremental=config['incremental'],
+        subscriber=session_id
+    )
+
+def run_app():
+    """Build the page for the current rerun"""
     # Configure page
     configure_page()
     
     # Create sidebar and get configuration
     config = create_sidebar()
     
-    # Create analyzer instance
+    # Create analyzer instance on top of the data shared by all sessions
     try:
+        with span("load_dataset"):
+            watcher = update_watch(config)
+            if watcher is not None:
+                # Changes are picked up by the watcher thread, never by the rerun
+                dataset = watcher.dataset()
+            else:
+                dataset = get_dataset(
+                    config['file_path'], 
+                    memory_map=config['memory_map'], 
+                    incremental=config['incremental']
+                )
+        if watcher is not None:
+            create_refresh_status(watcher)
         analyzer = InvestmentAnalyzer(
             config['file_path'], 
             stop_loss=config['stop_loss'], 
-            with_scam=config['with_scam']
+            with_scam=config['with_scam'],
+            dataset=dataset
         )
                 
         # Create tabs with analyzer and config
@@ -0,0 +1,301 @@
+"""
+Run optimization sweeps headlessly over many datasets and parameter settings.
+
+Every combination of the given CSV files, stop losses, scam settings,
+ranges, steps and search methods is one sweep. Sweeps run in parallel
+worker processes; each dataset is parsed once into the on-disk dataset
+cache, then memory-mapped by every worker, so its pages are shared rather
+than copied. The optimum and counts of every sweep are written as one row
+of a columnar results file (CSV, or Parquet when the output ends in
+.parquet), and with --grids the evaluated (x, y, value) points of each
+sweep are written to their own file in the same format.
+
+Usage (from the repository root):
+    python app/batch.py data/a.csv data/b.csv --output results.parquet
+                        [--stop-loss 0.2 0.3] [--with-scam no yes]
+                        [--x-range 20000 1000000] [--y-range 20000 1000000] [--step 10000 5000]
+                        [--method exhaustive adaptive] [--grids grids/] [--workers 8]
+
+The exit status is 1 if any sweep failed; its row then holds the error.
+"""
+import argparse
+import importlib.util
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.parallel import pool_context
+from utils.registry import get_dataset
+from utils.tim import InvestmentAnalyzer
+
+DEFAULT_RANGE = (20000, 1000000)
+# Columns following the task settings in the results, in order
+RESULT_COLUMNS = (
+    'rows', 'scam_rows', 'dropped_rows', 'optimal_x', 'optimal_y', 'optimal_value',
+    'x_count', 'y_count', 'evaluations', 'grid_file', 'error', 'elapsed_s'
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='+', help='CSV files to analyze')
+    parser.add_argument('--output', required=True, help='results file, .csv or .parquet')
+    parser.add_argument('--stop-loss', type=float, nargs='+', default=[0.3])
+    parser.add_argument('--with-scam', choices=['no', 'yes'], nargs='+', default=['no'],
+                        help='whether scam entries are counted')
+    parser.add_argument('--x-range', type=int, nargs=2, action='append', metavar=('MIN', 'MAX'),
+                        help=f"x range, repeat for several (default {DEFAULT_RANGE[0]} {DEFAULT_RANGE[1]})")
+    parser.add_argument('--y-range', type=int, nargs=2, action='append', metavar=('MIN', 'MAX'),
+                        help=f"y range, repeat for several (default {DEFAULT_RANGE[0]} {DEFAULT_RANGE[1]})")
+    parser.add_argument('--step', type=int, nargs='+', default=[10000])
+    parser.add_argument('--method', choices=['exhaustive', 'adaptive'], nargs='+', default=['exhaustive'])
+    parser.add_argument('--grids', help='directory receiving the evaluated points of every sweep')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    args = parser.parse_args(argv)
+
+    args.x_range = [tuple(r) for r in args.x_range or [DEFAULT_RANGE]]
+    args.y_range = [tuple(r) for r in args.y_range or [DEFAULT_RANGE]]
+    for path in args.files:
+        if not os.path.isfile(path):
+            parser.error(f"no such file: {path}")
+    if min(args.step) <= 0:
+        parser.error("steps must be positive")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    # Fail before hours of sweeps rather than when writing their results
+    if table_format(args.output) == 'parquet' and not parquet_available():
+        parser.error("Parquet output needs pyarrow or fastparquet; use a .csv output instead")
+    return args
+
+
+def table_format(path):
+    """
+    Return the table format of an output file from its extension.
+
+    Args:
+        path (str): Output file
+
+    Returns:
+        str: 'parquet' for .parquet files, 'csv' otherwise
+    """
+    return 'parquet' if path.lower().endswith('.parquet') else 'csv'
+
+
+def parquet_available():
+    """
+    Return whether pandas can write Parquet files here.
+
+    Returns:
+        bool: Whether pyarrow or fastparquet is installed
+    """
+    return any(importlib.util.find_spec(engine) is not None for engine in ('pyarrow', 'fastparquet'))
+
+
+def build_tasks(args):
+    """
+    Expand the command-line settings into one task per sweep.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments
+
+    Returns:
+        list: One dict per sweep with its id, file and settings
+    """
+    combinations = itertools.product(
+        args.files, args.stop_loss, args.with_scam, args.x_range, args.y_range, args.step, args.method
+    )
+    return [
+        {
+            'task': index,
+            'dataset': path,
+            'stop_loss': stop_loss,
+            'with_scam': with_scam == 'yes',
+            'x_min': x_range[0], 'x_max': x_range[1],
+            'y_min': y_range[0], 'y_max': y_range[1],
+            'step': step,
+            'method': method
+        }
+        for index, (path, stop_loss, with_scam, x_range, y_range, step, method) in enumerate(combinations)
+    ]
+
+
+def prepare_dataset(path):
+    """
+    Parse a CSV file into the on-disk dataset cache, if not cached already.
+
+    Args:
+        path (str): CSV file
+
+    Returns:
+        str: path
+    """
+    get_dataset(path, memory_map=True)
+    return path
+
+
+def run_sweep(task, grid_dir=None, grid_format='csv', workers=1):
+    """
+    Run one sweep and return its results row.
+
+    The dataset is memory-mapped from the on-disk cache and shared by every
+    sweep of this process through the registry.
+
+    Args:
+        task (dict): Task from build_tasks
+        grid_dir (str, optional): Directory receiving the evaluated points. Defaults to None.
+        grid_format (str, optional): 'csv' or 'parquet'. Defaults to 'csv'.
+        workers (int, optional): Processes sharing an exhaustive sweep. Defaults to 1.
+
+    Returns:
+        dict: The task settings with the dataset counts, the optimum, the number of
+            evaluated pairs, the elapsed time and the error if the sweep failed
+    """
+    # Every row has every column, so failed sweeps do not reorder the table
+    row = dict(task, **dict.fromkeys(RESULT_COLUMNS))
+    start = time.perf_counter()
+    try:
+        dataset = get_dataset(task['dataset'], memory_map=True)
+        analyzer = InvestmentAnalyzer(
+            task['dataset'], stop_loss=task['stop_loss'], with_scam=task['with_scam'], dataset=dataset
+        )
+        x_range = (task['x_min'], task['x_max'])
+        y_range = (task['y_min'], task['y_max'])
+        if task['method'] == 'adaptive':
+            result = analyzer.adaptive_search(x_range, y_range, task['step'])
+            optimum = result['optimum']
+            evaluations = result['evaluations']
+            points = (result['x'], result['y'], result['values'])
+        else:
+            surface = analyzer.surface(x_range, y_range, task['step'], workers)
+            optimum = surface.optimum()
+            evaluations = surface.valid_points
+            points = surface.points()
+
+        # optimum() has no counts when no pair has a positive value
+        x, y, value, x_count, y_count = (tuple(optimum) + (None, None))[:5]
+        row.update({
+            'rows': len(dataset),
+            'scam_rows': len(dataset.sorted_values) - len(dataset.sorted_clean_values),
+            'dropped_rows': dataset.dropped_rows,
+            'optimal_x': x,
+            'optimal_y': y,
+            'optimal_value': value,
+            'x_count': x_count,
+            'y_count': y_count,
+            'evaluations': evaluations
+        })
+        if grid_dir is not None:
+            name = os.path.splitext(os.path.basename(task['dataset']))[0]
+            grid_file = os.path.join(grid_dir, f"{task['task']:05d}-{name}.{grid_format}")
+            write_table({'x': points[0], 'y': points[1], 'value': points[2]}, grid_file)
+            row['grid_file'] = grid_file
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    row['elapsed_s'] = time.perf_counter() - start
+    return row
+
+
+def write_table(columns, path):
+    """
+    Write columns to a CSV or Parquet file, chosen by the file extension.
+
+    Args:
+        columns: dict of equal-length columns, or list of row dicts
+        path (str): Output file
+    """
+    # pandas is only needed for the output, so it is not imported at start-up
+    import pandas as pd
+
+    # Nullable dtypes keep integer columns integral when failed sweeps leave them empty
+    frame = pd.DataFrame(columns).convert_dtypes()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if table_format(path) == 'parquet':
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        frame.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def run_batch(tasks, workers, grid_dir=None, grid_format='csv', log=None):
+    """
+    Run every sweep, in parallel across worker processes.
+
+    Datasets are first parsed in parallel into the on-disk cache, one file
+    per worker, so that sweeps only memory-map them. Sweeps are then spread
+    over the workers, each computing its grid serially; a single sweep is
+    instead run here with its grid split across the workers.
+
+    Args:
+        tasks (list): Tasks from build_tasks
+        workers (int): Number of worker processes
+        grid_dir (str, optional): Directory receiving the evaluated points. Defaults to None.
+        grid_format (str, optional): 'csv' or 'parquet'. Defaults to 'csv'.
+        log (callable, optional): Called with a progress message after each sweep. Defaults to None.
+
+    Returns:
+        list: Results rows, in task order
+    """
+    log = log or (lambda message: None)
+    if len(tasks) == 1 or workers == 1:
+        rows = []
+        for task in tasks:
+            rows.append(run_sweep(task, grid_dir, grid_format, workers))
+            log(describe(rows[-1], len(rows), len(tasks)))
+        return rows
+
+    paths = list(dict.fromkeys(task['dataset'] for task in tasks))
+    rows = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=pool_context()) as pool:
+        # Failures are reported by the sweeps of the file
+        for future in as_completed([pool.submit(prepare_dataset, path) for path in paths]):
+            try:
+                log(f"prepared {future.result()}")
+            except Exception as e:
+                log(f"could not prepare a dataset: {e}")
+        futures = [pool.submit(run_sweep, task, grid_dir, grid_format) for task in tasks]
+        for future in as_completed(futures):
+            rows.append(future.result())
+            log(describe(rows[-1], len(rows), len(tasks)))
+    return sorted(rows, key=lambda row: row['task'])
+
+
+def describe(row, done, total):
+    """
+    Format the progress message of a finished sweep.
+
+    Args:
+        row (dict): Results row of the sweep
+        done (int): Sweeps finished so far
+        total (int): Number of sweeps
+
+    Returns:
+        str: One line describing the sweep and its outcome
+    """
+    settings = (
+        f"{os.path.basename(row['dataset'])} stop_loss={row['stop_loss']} with_scam={row['with_scam']} "
+        f"x=[{row['x_min']}, {row['x_max']}] y=[{row['y_min']}, {row['y_max']}] step={row['step']} {row['method']}"
+    )
+    if row['error'] is not None:
+        outcome = f"FAILED: {row['error']}"
+    else:
+        outcome = f"x={row['optimal_x']} y={row['optimal_y']} value={row['optimal_value']:.4f}"
+    return f"[{done}/{total}] {settings}: {outcome} ({row['elapsed_s']:.2f}s)"
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tasks = build_tasks(args)
+    print(f"{len(tasks)} sweeps over {len(args.files)} datasets with {args.workers} workers", file=sys.stderr)
+    log = lambda message: print(message, file=sys.stderr)  # noqa: E731
+    rows = run_batch(tasks, args.workers, args.grids, table_format(args.output), log)
+    write_table(rows, args.output)
+    failed = sum(row['error'] is not None for row in rows)
+    print(f"Wrote {len(rows)} results to {args.output}, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
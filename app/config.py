@@ -1,5 +1,12 @@
+import functools
+import os
 import streamlit as st
 from globals import COLORS
+from utils.perf import span
+
+# Put your image in the static folder, next to app.py
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+BACKGROUND_IMAGE = "bg3.png"
 
 def configure_page():
     """Configure Streamlit page settings"""
@@ -11,25 +18,25 @@ def configure_page():
     )
     
     # Apply custom CSS globally
-    st.markdown(get_custom_css(), unsafe_allow_html=True)
+    with span("custom_css"):
+        st.markdown(get_custom_css(), unsafe_allow_html=True)
     
     # Title and description
     st.title("📈 MemeCoin Data Dashboard")
     
+@functools.lru_cache(maxsize=None)
 def get_custom_css():
-    """Return custom CSS for styling all columns automatically"""
-    # First, you need to convert the local image to base64
-    import base64
-    
-    def get_base64_image(image_path):
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
+    """Return custom CSS for styling all columns automatically
     
-    # Replace with your local image path
-    try:
-        base64_image = get_base64_image("assets/bg3.png")  # Put your image in assets folder
-        background_image = f"data:image/png;base64,{base64_image}"
-    except FileNotFoundError:
+    The stylesheet only depends on constants, so it is built once per process.
+    The background image is not inlined: it is served by Streamlit's static
+    file serving (app/static, see .streamlit/config.toml) with ETag and
+    Last-Modified headers, so browsers cache it instead of receiving it
+    inline with every rerun.
+    """
+    if os.path.exists(os.path.join(STATIC_DIR, BACKGROUND_IMAGE)):
+        background_image = f"app/static/{BACKGROUND_IMAGE}"
+    else:
         # Fallback to the current online image
         background_image = "https://img.freepik.com/vecteurs-libre/vecteur-element-bulle-claire-fond-marine_53876-118551.jpg?semt=ais_hybrid&w=740"
     
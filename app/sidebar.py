@@ -1,5 +1,12 @@
+import os
+import time
 import streamlit as st
 from globals import COLORS
+from utils.dataset_cache import clear_cache
+from utils.registry import evict, registry_stats
+from utils.uploads import save_upload
+from utils.perf import PerfRecorder
+from utils.watcher import POLL_INTERVAL, renew_watch
 
 def create_sidebar():
     """Create sidebar with configuration options"""
@@ -8,15 +15,22 @@ def create_sidebar():
     # File upload section
     file_path = create_file_upload_section()
     
+    # Data loading options
+    loading_options = create_data_loading_section()
+    
     # Analysis parameters
     analysis_params = create_analysis_parameters_section()
     
     # Optimization ranges
     optimization_ranges = create_optimization_ranges_section()
     
+    # Performance instrumentation
+    create_performance_section()
+    
     # Combine all config
     config = {
         'file_path': file_path,
+        **loading_options,
         **analysis_params,
         **optimization_ranges
     }
@@ -25,23 +39,84 @@ def create_sidebar():
 
 def create_file_upload_section():
     """Create file upload section"""
-    """ uploaded_file = st.sidebar.file_uploader(
+    uploaded_file = st.sidebar.file_uploader(
         "Choose a CSV file", 
         type="csv",
         help="Upload a CSV file with investment data"
-    ) """
+    )
+    
+    if uploaded_file is None:
+        file_path = "data/test.csv"
+        st.sidebar.info("Using default test.csv file")
+    else:
+        file_path = get_upload_path(uploaded_file)
     
-    #if uploaded_file is None:
-    file_path = "data/test.csv"
-    #st.sidebar.info("Using default test.csv file")
-    """ else:
-        # Save uploaded file temporarily
-        file_path = f"temp_{uploaded_file.name}"
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer()) """
+    if st.sidebar.button("Clear Data Cache", help="Re-read the CSV file instead of the cached parsed copy"):
+        clear_cache(file_path)
+        evict(file_path)
+        st.sidebar.success("Data cache cleared")
     
     return file_path
 
+def get_upload_path(uploaded_file):
+    """Store an uploaded file once per upload and return its path"""
+    # Reruns reuse the stored copy instead of hashing the upload again
+    upload_paths = st.session_state.setdefault('upload_paths', {})
+    file_path = upload_paths.get(uploaded_file.file_id)
+    if file_path is None or not os.path.exists(file_path):
+        file_path = upload_paths[uploaded_file.file_id] = save_upload(uploaded_file)
+    return file_path
+
+def create_data_loading_section():
+    """Create data loading options section"""
+    memory_map = st.sidebar.checkbox(
+        "Memory-map Data",
+        False,
+        help="Keep the parsed data on disk instead of in RAM, for files larger than memory"
+    )
+    incremental = st.sidebar.checkbox(
+        "Append New Rows",
+        True,
+        help="When the CSV file grows, only read the rows appended since the last load",
+        disabled=memory_map
+    )
+    auto_refresh = st.sidebar.checkbox(
+        "Auto Refresh",
+        False,
+        help="Watch the CSV file and reload it in the background when it changes"
+    )
+    
+    return {
+        'memory_map': memory_map,
+        'incremental': incremental and not memory_map,
+        'auto_refresh': auto_refresh
+    }
+
+def create_refresh_status(watcher):
+    """Show the file watcher status, rerunning the app when it loads new data"""
+    with st.sidebar:
+        show_refresh_status(watcher)
+
+def show_refresh_status(watcher):
+    """Display when the watched file was last refreshed"""
+    # Runs every POLL_INTERVAL while the session is open, which keeps the watcher alive
+    renew_watch(watcher, st.session_state.session_id)
+    version = st.session_state.get('data_version')
+    st.session_state.data_version = watcher.version
+    if version is not None and version != watcher.version:
+        st.rerun()
+    
+    if watcher.last_refresh is None:
+        st.caption(f"Watching {watcher.file_path} for changes")
+    else:
+        st.caption(f"Data refreshed at {time.strftime('%H:%M:%S', time.localtime(watcher.last_refresh))}")
+    if watcher.last_error is not None:
+        st.warning(f"Last refresh failed: {watcher.last_error}")
+
+if hasattr(st, 'fragment'):
+    # Re-check on its own so new data shows up without user interaction
+    show_refresh_status = st.fragment(run_every=POLL_INTERVAL)(show_refresh_status)
+
 def create_analysis_parameters_section():
     """Create analysis parameters section"""
     st.sidebar.subheader("Analysis Parameters")
@@ -72,11 +147,87 @@ def create_optimization_ranges_section():
     y_min = st.sidebar.number_input("Y Min", value=20000, step=10000)
     y_max = st.sidebar.number_input("Y Max", value=1000000, step=10000)
     step = st.sidebar.number_input("Step Size", value=10000, step=1000)
+    search_method = st.sidebar.radio(
+        "Search Method", 
+        ["Exhaustive", "Adaptive"], 
+        help="Adaptive refines the best regions of a coarse grid instead of evaluating every point"
+    )
+    workers = st.sidebar.number_input(
+        "Workers", 
+        min_value=1, max_value=os.cpu_count() or 1, value=1, step=1,
+        help="Processes sharing the exhaustive optimization sweep, for fine steps"
+    )
     
     return {
         'x_min': x_min,
         'x_max': x_max,
         'y_min': y_min,
         'y_max': y_max,
-        'step': step
-    }
\ No newline at end of file
+        'step': step,
+        'search_method': search_method.lower(),
+        'workers': workers
+    }
+
+def create_performance_section():
+    """Create the performance instrumentation toggle"""
+    st.sidebar.subheader("Performance")
+    st.sidebar.checkbox(
+        "Performance Panel",
+        False,
+        key="performance_panel",
+        help="Time the loading, page and computation stages of each rerun"
+    )
+
+def get_perf_recorder():
+    """Return the session's performance recorder, or None when the panel is off"""
+    # Read from the widget state so the stages before the sidebar are timed too
+    if not st.session_state.get('performance_panel', False):
+        return None
+    return st.session_state.setdefault('perf_recorder', PerfRecorder())
+
+def create_performance_panel(recorder):
+    """Display the timings of the last rerun and of the whole session"""
+    import pandas as pd
+    
+    with st.sidebar.expander("Performance", expanded=True):
+        st.caption(f"Session {recorder.session_id} · {recorder.reruns} reruns")
+        
+        st.markdown("**Last rerun**")
+        st.dataframe(pd.DataFrame([
+            {
+                'stage': "  " * record['depth'] + record['name'],
+                'ms': round(record['duration_s'] * 1000, 1),
+                'RSS Δ (MB)': round(record['rss_delta_bytes'] / 1e6, 1)
+            }
+            for record in recorder.last_rerun
+        ]), hide_index=True)
+        
+        st.markdown("**Session**")
+        st.dataframe(pd.DataFrame([
+            {
+                'stage': row['name'],
+                'count': row['count'],
+                'total (ms)': round(row['total_s'] * 1000, 1),
+                'mean (ms)': round(row['mean_s'] * 1000, 1),
+                'max (ms)': round(row['max_s'] * 1000, 1)
+            }
+            for row in recorder.summary()
+        ]), hide_index=True)
+
+        st.markdown("**Shared datasets**")
+        st.dataframe(pd.DataFrame([
+            {
+                'file': os.path.basename(row['file_path']),
+                'memory-mapped': row['memory_map'],
+                'rows': row['rows'],
+                'RAM (MB)': round(row['bytes'] / 1e6, 1)
+            }
+            for row in registry_stats()
+        ]), hide_index=True)
+
+        st.download_button(
+            "Export JSON Lines",
+            recorder.to_jsonl(),
+            file_name=f"perf_{recorder.session_id}.jsonl",
+            mime="application/x-ndjson"
+        )
@@ -3,15 +3,12 @@ from tabs_pages.data_overview import create_data_overview_tab
 from tabs_pages.parameter_analysis import create_parameter_analysis_tab
 from tabs_pages.optimization import create_optimization_tab
 from tabs_pages.visualizations import create_visualizations_tab
-from config import get_custom_css
 from globals import COLORS
+from utils.perf import span
 
 def create_tabs(analyzer, config):
     """Create main tabs for the application"""
     
-    # Apply custom CSS
-    st.markdown(get_custom_css(), unsafe_allow_html=True)
-    
     # Create tabs
     tab1, tab2, tab3, tab4 = st.tabs([
         "📊 Data Overview", 
@@ -20,16 +17,16 @@ def create_tabs(analyzer, config):
         "📈 Visualizations"
     ])
     
-    with tab1:
+    with tab1, span("tab_data_overview"):
         create_data_overview_tab(analyzer)
     
-    with tab2:
+    with tab2, span("tab_parameter_analysis"):
         create_parameter_analysis_tab(analyzer)
     
-    with tab3:
+    with tab3, span("tab_optimization"):
         create_optimization_tab(analyzer, config)
     
-    with tab4:
+    with tab4, span("tab_visualizations"):
         create_visualizations_tab(analyzer, config)
 
     
@@ -1,8 +1,7 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import plotly.express as px
 from globals import COLORS
+from utils.perf import span
 
 def create_data_overview_tab(analyzer):
     """Create data overview tab content"""
@@ -21,32 +20,86 @@ def display_basic_statistics(analyzer):
     """Display basic statistics about the data"""
     col1, col2, col3 = st.columns(3)
     
-    values = [item[0] for item in analyzer.data]
-    scams = [item[1] for item in analyzer.data]
+    # Computed once per dataset and shared by every rerun and session
+    with span("overview_summary"):
+        summary = analyzer.summary
     
     with col1:
-        st.metric("Total Data Points", len(analyzer.data))
-        st.metric("Average Value", f"{np.mean(values):.2f}")
+        st.metric("Total Data Points", summary.count)
+        st.metric("Average Value", f"{summary.mean:.2f}")
     
     with col2:
-        st.metric("Scam Count", sum(scams))
-        st.metric("Scam Percentage", f"{(sum(scams)/len(scams)*100):.1f}%")
+        st.metric("Scam Count", summary.scam_count)
+        st.metric("Scam Percentage", f"{summary.scam_share*100:.1f}%")
     
     with col3:
-        st.metric("Max Value", max(values))
-        st.metric("Min Value", min(values))
+        st.metric("Max Value", summary.max)
+        st.metric("Min Value", summary.min)
+    
+    if summary.quantiles:
+        st.caption(" · ".join(
+            f"P{quantile*100:g}: {value:,.0f}" for quantile, value in summary.quantiles.items()
+        ))
+    
+    if analyzer.dropped_rows:
+        st.caption(f"{analyzer.dropped_rows:,} invalid rows were skipped while loading the file.")
 
 def display_data_distribution(analyzer):
     """Display data distribution histogram"""
+    import plotly.graph_objects as go
+    
     st.subheader("Value Distribution")
     
-    values = [item[0] for item in analyzer.data if item[0] < 2e6]
-    fig = px.histogram(x=values, nbins=50, title="Distribution of Investment Values", 
-                       labels={'x': 'Value', 'y': 'Frequency'},
-                       color_discrete_sequence=[COLORS['primaryColor']])
+    summary = analyzer.summary
+    if not summary.count:
+        st.info("No data to display.")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        bins = st.slider("Bins", 10, 200, 50, 10, key="histogram_bins")
+    with col2:
+        scale = st.radio("Bin Scale", ["Linear", "Log"], horizontal=True, key="histogram_scale").lower()
+    with col3:
+        max_value = st.number_input("Max Value", min_value=1, value=2000000, step=100000, key="histogram_max")
+    with col4:
+        split = st.checkbox("Split Scam / Non-scam", key="histogram_split")
+    
+    low = max(summary.min, 1) if scale == 'log' else summary.min
+    high = min(max_value, summary.max)
+    if high <= low:
+        st.info("No values in the selected range.")
+        return
+    
+    # Binned server-side and cached per (bins, range, scale); only the counts
+    # are sent to the browser, whatever the size of the dataset
+    with span("overview_histogram"):
+        histogram = analyzer.dataset.histogram(bins, (low, high), scale)
+    edges = histogram['edges']
+    if split:
+        series = [("Non-scam", histogram['clean_counts'], None), ("Scam", histogram['scam_counts'], None)]
+    else:
+        series = [("All", histogram['counts'], COLORS['primaryColor'])]
+    
+    fig = go.Figure()
+    for name, counts, color in series:
+        # Step outline over the bin edges, drawn the same on linear and log axes
+        fig.add_trace(go.Scatter(
+            x=edges,
+            y=np.append(counts, counts[-1]),
+            name=name,
+            mode='lines',
+            line_shape='hv',
+            line_color=color,
+            stackgroup='counts',
+            hovertemplate="Value: %{x:,.0f}<br>Frequency: %{y:,}<extra>%{fullData.name}</extra>"
+        ))
     fig.update_layout(
+        title="Distribution of Investment Values",
         xaxis_title="Value", 
         yaxis_title="Frequency",
+        xaxis_type=scale,
+        showlegend=split,
         paper_bgcolor=COLORS['transparent'],  # Transparent background
         plot_bgcolor=COLORS['transparent'],
         font_color=COLORS['textColor']
@@ -54,8 +107,36 @@ def display_data_distribution(analyzer):
     st.plotly_chart(fig, use_container_width=True)
 
 def display_data_sample(analyzer):
-    """Display sample of raw data"""
+    """Display a paginated sample of raw data"""
+    import pandas as pd
+    
     st.subheader("Data Sample")
     
-    df = pd.DataFrame(analyzer.data, columns=['Value', 'Is_Scam'])
-    st.dataframe(df.head(100), use_container_width=True)
\ No newline at end of file
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        scam_option = st.selectbox("Rows", ["All", "Scam only", "Non-scam only"], key="sample_scam_filter")
+    with col2:
+        min_value = st.number_input("Min Value", value=None, step=1000, key="sample_min_value")
+    with col3:
+        max_value = st.number_input("Max Value", value=None, step=1000, key="sample_max_value")
+    with col4:
+        page_size = st.selectbox("Rows per Page", [25, 50, 100, 250], index=2, key="sample_page_size")
+    
+    scam_filter = {"All": None, "Scam only": True, "Non-scam only": False}[scam_option]
+    value_range = (min_value, max_value)
+    
+    # Only the requested page is materialized; the filters are evaluated on the
+    # dataset's arrays chunk by chunk
+    total = analyzer.dataset.count_matching(scam_filter, value_range)
+    pages = max(-(-total // page_size), 1)
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, value=1, step=1, key="sample_page")
+    page = min(page, pages)
+    sample = analyzer.dataset.sample_page(page - 1, page_size, scam_filter, value_range)
+    
+    df = pd.DataFrame({'Value': sample['values'], 'Is_Scam': sample['scams']}, index=sample['rows'])
+    st.dataframe(df, use_container_width=True)
+    if total:
+        first = (page - 1) * page_size + 1
+        st.caption(f"Rows {first:,}–{first + len(df) - 1:,} of {total:,} matching rows")
+    else:
+        st.caption("No rows match the filters.")
@@ -1,37 +1,105 @@
 import streamlit as st
 from globals import COLORS
+from utils.jobs import submit_optimization, job_key
 
 def create_optimization_tab(analyzer, config):
     """Create optimization tab content"""
     st.header("Parameter Optimization")
-    st.write("Goes through all possible values of X and Y to find the optimal parameters for the best expected value.")
+    st.write("Goes through all possible values of X and Y to find the optimal parameters for the best expected value. "
+             "The adaptive search method refines the best regions of a coarse grid instead, which is much faster at fine steps.")
     
     # Custom styled optimization button
     st.markdown('<div class="optimization-button">', unsafe_allow_html=True)
     if st.button("🚀 Run Optimization", key="opt_button"):
         run_optimization(analyzer, config)
     st.markdown('</div>', unsafe_allow_html=True)
+    
+    job = st.session_state.get('optimization_job')
+    if job is not None and job.key != current_job_key(analyzer, config):
+        discard_stale_job(job)
+        job = None
+    if job is not None:
+        # A reload of the file does not stop the job: it finishes on the data it started with
+        if job.analyzer.dataset is not analyzer.dataset:
+            st.warning("The data was refreshed after this optimization started, so its result is for the "
+                       "previous data. Run it again for up-to-date results.")
+        if job.done:
+            display_job_result(job)
+        else:
+            display_job_progress(job)
+
+def current_job_key(analyzer, config):
+    """Return the job key of an optimization of the current file with the current settings"""
+    return job_key(
+        analyzer,
+        x_range=(config['x_min'], config['x_max']),
+        y_range=(config['y_min'], config['y_max']),
+        step=config['step'],
+        method=config['search_method']
+    )
+
+def discard_stale_job(job):
+    """Forget a job whose file or settings no longer match the page"""
+    if not job.done:
+        job.cancel()
+    del st.session_state.optimization_job
+    st.session_state.pop('optimization_results', None)
+    st.info("The file or settings changed since the last optimization. Run it again for up-to-date results.")
 
 def run_optimization(analyzer, config):
-    """Run the optimization process"""
-    with st.spinner("Running optimization... This may take a moment."):
-        try:
-            optimal_x, optimal_y, optimal_value, x_count, y_count = analyzer.find_optimal_parameters(
-                x_range=(config['x_min'], config['x_max']),
-                y_range=(config['y_min'], config['y_max']),
-                step=config['step'],
-                visualize=False
-            )
-            
-            # Display results
-            st.success("✅ Optimization completed!")
-            display_optimization_results(optimal_x, optimal_y, optimal_value, x_count, y_count)
-            
-            # Store results in session state for visualization
-            store_optimization_results(optimal_x, optimal_y, optimal_value, x_count, y_count)
-            
-        except Exception as e:
-            st.error(f"❌ Optimization failed: {str(e)}")
+    """Start the optimization in the background"""
+    # Sessions asking for the same search share one computation
+    job = submit_optimization(
+        analyzer,
+        x_range=(config['x_min'], config['x_max']),
+        y_range=(config['y_min'], config['y_max']),
+        step=config['step'],
+        method=config['search_method'],
+        workers=config['workers']
+    )
+    previous = st.session_state.get('optimization_job')
+    if previous is not None and not previous.done:
+        previous.cancel()
+    st.session_state.optimization_job = job
+
+def display_job_progress(job):
+    """Display the progress of a running optimization"""
+    if job.done:
+        # Show the result with the rest of the page
+        st.rerun()
+    
+    text = f"Running optimization... {job.progress:.0%} ({job.elapsed:.1f} s)"
+    if job.best is not None:
+        best_x, best_y, best_value = job.best
+        text += f" · best so far: X={best_x:,}, Y={best_y:,}, value {best_value:.4f}"
+    st.progress(job.progress, text=text)
+    
+    if st.button("✖ Cancel", key="opt_cancel"):
+        job.cancel()
+        del st.session_state.optimization_job
+        st.rerun()
+
+if hasattr(st, 'fragment'):
+    # Refreshes on its own while the job runs; the rest of the page stays interactive
+    display_job_progress = st.fragment(run_every=0.5)(display_job_progress)
+
+def display_job_result(job):
+    """Display the outcome of a finished optimization"""
+    if job.state == 'cancelled':
+        st.info("Optimization cancelled.")
+        return
+    if job.state == 'failed':
+        st.error(f"❌ Optimization failed: {str(job.error)}")
+        return
+    
+    optimal_x, optimal_y, optimal_value, x_count, y_count = job.result['optimum']
+    st.success(f"✅ Optimization completed in {job.elapsed:.1f} s!")
+    display_optimization_results(optimal_x, optimal_y, optimal_value, x_count, y_count)
+    if job.result['search'] is not None:
+        display_search_statistics(job.result['search'])
+    
+    # Store results in session state for visualization
+    store_optimization_results(optimal_x, optimal_y, optimal_value, x_count, y_count)
 
 def display_optimization_results(optimal_x, optimal_y, optimal_value, x_count, y_count):
     """Display optimization results"""
@@ -48,6 +116,16 @@ def display_optimization_results(optimal_x, optimal_y, optimal_value, x_count, y
     with col3:
         st.metric("Optimal Value", f"{optimal_value:.4f}")
 
+def display_search_statistics(search):
+    """Display how much of the grid the adaptive search evaluated"""
+    evaluations = search['evaluations']
+    exhaustive = search['exhaustive_evaluations']
+    share = evaluations / exhaustive if exhaustive else 0
+    st.caption(
+        f"Adaptive search evaluated {evaluations:,} of {exhaustive:,} grid points "
+        f"({share:.2%}) over {search['levels']} levels."
+    )
+
 def store_optimization_results(optimal_x, optimal_y, optimal_value, x_count, y_count):
     """Store optimization results in session state"""
     st.session_state.optimization_results = {
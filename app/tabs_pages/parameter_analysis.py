@@ -1,6 +1,4 @@
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
 from globals import COLORS
 
 def create_parameter_analysis_tab(analyzer):
@@ -51,6 +49,8 @@ def create_custom_parameter_testing_section(analyzer):
 
 def create_completion_pie_chart(y_count, x_count, x_value, y_value):
     """Create a pie chart showing completion ratio of y/x"""
+    import plotly.graph_objects as go
+    
     if x_count == 0:
         st.error("Cannot create pie chart: X value cannot be zero")
         return
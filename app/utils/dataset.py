@@ -0,0 +1,393 @@
+import os
+import numpy as np
+from utils.loader import complete_length, read_anchor, read_csv_columns, read_csv_tail
+from utils import dataset_cache
+from utils.result_cache import LRUCache
+from utils.summary import SummaryStatistics
+from utils.histogram import compute_histogram
+from utils.pager import chunk_match_counts, is_filtered, read_page
+from utils.perf import span
+
+VALUE_CACHE_SIZE = 100000
+GRID_CACHE_SIZE = 16
+# One grid at a fine step is hundreds of MB, so the grid cache is limited by size too
+GRID_CACHE_BYTES = 512 * 1024 ** 2
+HISTOGRAM_CACHE_SIZE = 32
+SURVIVAL_CACHE_SIZE = 64
+# An index at step 1 over a wide range is tens of MB
+SURVIVAL_CACHE_BYTES = 256 * 1024 ** 2
+FILTER_CACHE_SIZE = 16
+
+
+class Dataset:
+    """
+    Immutable column store of a parsed CSV file.
+
+    Holds the value and scam columns, the sorted arrays used for threshold
+    queries and the survival-count indexes built from them. The column data
+    does not depend on analysis parameters such as stop_loss or with_scam,
+    so one instance can be shared by every analyzer working on the same
+    file. The result caches are keyed by those parameters and live here so
+    that they are shared too, and dropped together with the data.
+    """
+
+    def __init__(self, values, scams, sorted_values=None, sorted_clean_values=None, dropped_rows=0, file_path=None,
+                 source_bytes=None, source_anchor=None):
+        """
+        Initialize the dataset from its column arrays.
+
+        Args:
+            values (np.ndarray): int64 values
+            scams (np.ndarray): bool scam flags
+            sorted_values (np.ndarray, optional): values sorted ascending. Computed when omitted.
+            sorted_clean_values (np.ndarray, optional): non-scam values sorted ascending. Computed when omitted.
+            dropped_rows (int, optional): Number of invalid rows skipped while parsing. Defaults to 0.
+            file_path (str, optional): Source CSV file. Defaults to None.
+            source_bytes (int, optional): Length of the source file the data was parsed from.
+                Defaults to None (unknown, rows cannot be appended).
+            source_anchor (bytes, optional): Last bytes of that part of the file, used to
+                check it was only appended to since. Defaults to None.
+        """
+        if sorted_values is None:
+            sorted_values = np.sort(values)
+        if sorted_clean_values is None:
+            sorted_clean_values = np.sort(values[~scams])
+        self.values = values
+        self.scams = scams
+        self.sorted_values = sorted_values
+        self.sorted_clean_values = sorted_clean_values
+        self.dropped_rows = dropped_rows
+        self.file_path = file_path
+        self.source_bytes = source_bytes
+        self.source_anchor = source_anchor
+        for array in (values, scams, sorted_values, sorted_clean_values):
+            if not isinstance(array, np.memmap):
+                array.flags.writeable = False
+        self._summary = None
+        self.survival_cache = LRUCache(SURVIVAL_CACHE_SIZE, max_bytes=SURVIVAL_CACHE_BYTES)
+        self.value_cache = LRUCache(VALUE_CACHE_SIZE)
+        self.grid_cache = LRUCache(GRID_CACHE_SIZE, max_bytes=GRID_CACHE_BYTES)
+        self.histogram_cache = LRUCache(HISTOGRAM_CACHE_SIZE)
+        self.filter_cache = LRUCache(FILTER_CACHE_SIZE)
+
+    @classmethod
+    def load(cls, file_path, use_cache=True, memory_map=False):
+        """
+        Load a CSV file, from the on-disk cache when possible.
+
+        On a cache miss the CSV file is parsed and the result is stored in the
+        cache, so later loads of the unchanged file skip parsing entirely. In
+        memory-map mode the file is parsed straight into the cache and the
+        arrays stay on disk, paged in by the OS as queries touch them. A last
+        line without its newline is taken as still being written and is only
+        read by load_appended once complete.
+
+        Args:
+            file_path (str): Path to the CSV file to load
+            use_cache (bool, optional): Whether to reuse the parsed arrays cached on disk. Defaults to True.
+            memory_map (bool, optional): Whether to memory-map the cached arrays. Implies use_cache.
+                Defaults to False.
+
+        Returns:
+            Dataset: The loaded dataset
+        """
+        mmap_mode = 'r' if memory_map else None
+        # Rows appended while loading, and a last line still being written, are left for load_appended
+        file_bytes = os.path.getsize(file_path)
+        source_bytes = complete_length(file_path, file_bytes)
+        source_anchor = read_anchor(file_path, source_bytes)
+        cached = dataset_cache.load_dataset(file_path, mmap_mode=mmap_mode) if use_cache or memory_map else None
+        if cached is None and memory_map:
+            dataset_cache.build_dataset(file_path)
+            cached = dataset_cache.load_dataset(file_path, mmap_mode=mmap_mode)
+        if cached is not None:
+            return cls(
+                cached['values'],
+                cached['scams'],
+                cached['sorted_values'],
+                cached['sorted_clean_values'],
+                dropped_rows=cached['meta']['dropped_rows'],
+                file_path=file_path,
+                source_bytes=source_bytes,
+                source_anchor=source_anchor
+            )
+
+        with span("csv_parse"):
+            values, scams, dropped_rows = read_csv_columns(file_path, byte_range=(0, source_bytes))
+        dataset = cls(
+            values, scams, dropped_rows=dropped_rows, file_path=file_path,
+            source_bytes=source_bytes, source_anchor=source_anchor
+        )
+        # A file that grew meanwhile would be cached under the hash of content not parsed
+        if use_cache and os.path.getsize(file_path) == file_bytes:
+            try:
+                dataset_cache.store_dataset(
+                    file_path,
+                    {
+                        'values': dataset.values,
+                        'scams': dataset.scams,
+                        'sorted_values': dataset.sorted_values,
+                        'sorted_clean_values': dataset.sorted_clean_values
+                    },
+                    {'dropped_rows': dropped_rows}
+                )
+            except OSError:
+                # A read-only data directory only disables caching
+                pass
+        return dataset
+
+    def load_appended(self):
+        """
+        Load the rows appended to the source file since this dataset was read.
+
+        Only the new complete lines are parsed; they are merged into a new
+        dataset (see extended), and this one is left untouched for the
+        sessions still using it. The parsed arrays cached on disk are not
+        updated, since rewriting them would cost a pass over all the data.
+
+        Returns:
+            Dataset: This dataset if nothing was appended, a new dataset with the
+            appended rows, or None if the file was rewritten, truncated or is
+            memory-mapped, in which case it must be loaded again
+        """
+        if self.file_path is None or self.source_bytes is None or isinstance(self.values, np.memmap):
+            return None
+        try:
+            if os.path.getsize(self.file_path) < self.source_bytes:
+                return None
+            if read_anchor(self.file_path, self.source_bytes) != self.source_anchor:
+                return None
+            values, scams, dropped_rows, source_bytes = read_csv_tail(self.file_path, self.source_bytes)
+        except OSError:
+            return None
+        if source_bytes == self.source_bytes:
+            return self
+        return self.extended(
+            values, scams, dropped_rows, source_bytes=source_bytes,
+            source_anchor=read_anchor(self.file_path, source_bytes)
+        )
+
+    def extended(self, values, scams, dropped_rows=0, source_bytes=None, source_anchor=None):
+        """
+        Return a new dataset with rows appended to this one.
+
+        The new values are sorted on their own and merged into the sorted
+        arrays, and every survival index already built is carried over by
+        adding the counts of the new values only. Result caches start empty.
+
+        Args:
+            values (np.ndarray): int64 values of the new rows
+            scams (np.ndarray): bool scam flags of the new rows
+            dropped_rows (int, optional): Number of invalid new rows skipped. Defaults to 0.
+            source_bytes (int, optional): Length of the source file now parsed. Defaults to None.
+            source_anchor (bytes, optional): Last bytes of that part of the file. Defaults to None.
+
+        Returns:
+            Dataset: The extended dataset
+        """
+        new_sorted_values = np.sort(values)
+        new_sorted_clean_values = np.sort(values[~scams])
+        dataset = Dataset(
+            np.concatenate((self.values, values)),
+            np.concatenate((self.scams, scams)),
+            merge_sorted(self.sorted_values, new_sorted_values),
+            merge_sorted(self.sorted_clean_values, new_sorted_clean_values),
+            dropped_rows=self.dropped_rows + dropped_rows,
+            file_path=self.file_path,
+            source_bytes=source_bytes,
+            source_anchor=source_anchor
+        )
+        for key in self.survival_cache.keys():
+            counts = self.survival_cache.get(key)
+            if counts is None:
+                continue
+            step, (start, stop), with_scam = key
+            new_values = new_sorted_values if with_scam else new_sorted_clean_values
+            thresholds = np.arange(start, stop + 1, step, dtype=np.int64)
+            counts = counts + (len(new_values) - np.searchsorted(new_values, thresholds, side='right'))
+            counts.flags.writeable = False
+            dataset.survival_cache.put(key, counts)
+        return dataset
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def nbytes(self):
+        """
+        int: Bytes of column data and cached results held in RAM (memory-mapped arrays count as zero).
+        """
+        arrays = [self.values, self.scams, self.sorted_values, self.sorted_clean_values]
+        caches = (self.survival_cache, self.value_cache, self.grid_cache, self.histogram_cache, self.filter_cache)
+        return (
+            sum(array.nbytes for array in arrays if not isinstance(array, np.memmap))
+            + sum(cache.nbytes for cache in caches)
+        )
+
+    @property
+    def summary(self):
+        """
+        SummaryStatistics: Statistics of the data, computed on first use and then shared.
+        """
+        if self._summary is None:
+            # Concurrent sessions may both compute it; the results are identical
+            self._summary = SummaryStatistics.from_dataset(self)
+        return self._summary
+
+    def histogram(self, bins=50, value_range=None, scale='linear'):
+        """
+        Bin the values into counts, split into scam and non-scam entries.
+
+        Counts are binary searches in the sorted arrays, so the cost and the
+        size of the result depend on the number of bins only. Results are
+        cached per (bins, range, scale).
+
+        Args:
+            bins (int, optional): Number of bins. Defaults to 50.
+            value_range (tuple, optional): (low, high) covered by the bins. Defaults to (min, max).
+            scale (str, optional): 'linear' or 'log' bins. Defaults to 'linear'.
+
+        Returns:
+            dict: 'edges', and the 'counts', 'clean_counts' and 'scam_counts' of each bin (read-only)
+        """
+        if value_range is None:
+            value_range = (self.summary.min, self.summary.max)
+        key = (bins, tuple(value_range), scale)
+        histogram = self.histogram_cache.get(key)
+        if histogram is None:
+            histogram = compute_histogram(self.sorted_values, self.sorted_clean_values, bins, value_range, scale)
+            for array in histogram.values():
+                array.flags.writeable = False
+            self.histogram_cache.put(key, histogram)
+        return histogram
+
+    def sample_page(self, page, page_size, scam_filter=None, value_range=None):
+        """
+        Return one page of the rows matching the sample filters.
+
+        Filters are evaluated chunk by chunk and the per-chunk match counts
+        are cached per filter, so turning pages only scans the chunks under
+        the requested page and memory does not grow with the dataset.
+
+        Args:
+            page (int): Page number, starting at 0
+            page_size (int): Rows per page
+            scam_filter (bool, optional): True keeps scam rows only, False non-scam rows only.
+                Defaults to None (both).
+            value_range (tuple, optional): Inclusive (low, high) bounds on the value, either of
+                which may be None. Defaults to None (any value).
+
+        Returns:
+            dict: 'rows' (row numbers), 'values' and 'scams' of the page, and 'total' matching rows
+        """
+        match_counts = self.match_counts(scam_filter, value_range)
+        rows, values, scams = read_page(self.values, self.scams, match_counts, page, page_size, scam_filter, value_range)
+        return {'rows': rows, 'values': values, 'scams': scams, 'total': int(match_counts.sum())}
+
+    def count_matching(self, scam_filter=None, value_range=None):
+        """
+        Count the rows matching the sample filters.
+
+        Args:
+            scam_filter (bool, optional): See sample_page. Defaults to None.
+            value_range (tuple, optional): See sample_page. Defaults to None.
+
+        Returns:
+            int: Number of matching rows
+        """
+        return int(self.match_counts(scam_filter, value_range).sum())
+
+    def match_counts(self, scam_filter=None, value_range=None):
+        """
+        Return the number of rows matching the sample filters in each chunk of the data.
+
+        Args:
+            scam_filter (bool, optional): See sample_page. Defaults to None.
+            value_range (tuple, optional): See sample_page. Defaults to None.
+
+        Returns:
+            np.ndarray: Count of matching rows per chunk, cached per filter
+        """
+        if not is_filtered(scam_filter, value_range):
+            return np.array([len(self)], dtype=np.int64)
+        key = (scam_filter, tuple(value_range) if value_range is not None else None)
+        counts = self.filter_cache.get(key)
+        if counts is None:
+            counts = chunk_match_counts(self.values, self.scams, scam_filter, value_range)
+            counts.flags.writeable = False
+            self.filter_cache.put(key, counts)
+        return counts
+
+    def count_above(self, threshold, with_scam):
+        """
+        Count the values strictly greater than a threshold.
+
+        Args:
+            threshold (int): Threshold value
+            with_scam (bool): Whether scam entries are counted
+
+        Returns:
+            int: Count of values above the threshold
+        """
+        values = self.sorted_values if with_scam else self.sorted_clean_values
+        return int(len(values) - np.searchsorted(values, threshold, side='right'))
+
+    def survival_counts(self, thresholds, with_scam):
+        """
+        Count the values strictly greater than each of several thresholds.
+
+        Args:
+            thresholds (array-like): Threshold values
+            with_scam (bool): Whether scam entries are counted
+
+        Returns:
+            np.ndarray: Count of values above each threshold
+        """
+        values = self.sorted_values if with_scam else self.sorted_clean_values
+        return len(values) - np.searchsorted(values, thresholds, side='right')
+
+    def survival_index(self, start, stop, step, with_scam):
+        """
+        Return the complementary CDF of the data evaluated on a threshold grid.
+
+        Entry k holds the count of values strictly greater than start + k * step,
+        for every grid threshold up to stop. The index is built on first use and
+        kept in survival_cache per (step, range, with_scam), so later grid
+        lookups are plain array indexing.
+
+        Args:
+            start (int): First threshold of the grid
+            stop (int): Last allowed threshold of the grid (inclusive)
+            step (int): Spacing between thresholds
+            with_scam (bool): Whether scam entries are counted
+
+        Returns:
+            np.ndarray: Count of values above each grid threshold (read-only)
+        """
+        key = (step, (start, stop), with_scam)
+        counts = self.survival_cache.get(key)
+        if counts is None:
+            # Concurrent sessions may both build the same index; the results are identical
+            thresholds = np.arange(start, stop + 1, step, dtype=np.int64)
+            counts = self.survival_counts(thresholds, with_scam)
+            counts.flags.writeable = False
+            self.survival_cache.put(key, counts)
+        return counts
+
+
+def merge_sorted(sorted_values, new_sorted_values):
+    """
+    Merge two ascending arrays into a new ascending array.
+
+    The insertion points are binary searches of the new values, so the
+    work besides the final copy grows with the number of new values only.
+
+    Args:
+        sorted_values (np.ndarray): Values sorted ascending
+        new_sorted_values (np.ndarray): Values to add, sorted ascending
+
+    Returns:
+        np.ndarray: All the values sorted ascending
+    """
+    positions = np.searchsorted(sorted_values, new_sorted_values, side='right')
+    return np.insert(sorted_values, positions, new_sorted_values)
@@ -0,0 +1,484 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import numpy as np
+from utils.external_sort import sort_to_file
+from utils.loader import CHUNK_SIZE, complete_length, parse_columns
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: the manifest is only locked between threads
+    fcntl = None
+
+CACHE_DIR_NAME = '.dataset_cache'
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = 'manifest.lock'
+META_NAME = 'meta.json'
+FORMAT_VERSION = 3
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# path -> ((size, mtime), content hash) of the last version hashed, so unchanged files
+# are hashed once per process; older versions of a growing file are not kept
+_content_hashes = {}
+# Serializes manifest updates between threads; a file lock does between processes
+_manifest_lock = threading.Lock()
+
+
+def cache_dir_for(file_path):
+    """
+    Return the cache directory used for a source CSV file.
+
+    Args:
+        file_path (str): Path to the source CSV file
+
+    Returns:
+        str: Path of the cache directory next to the file
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIR_NAME)
+
+
+def file_fingerprint(file_path):
+    """
+    Return the (path, size, mtime) triple identifying a file version.
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        tuple: Absolute path, size in bytes and modification time in nanoseconds
+    """
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+
+def content_hash(file_path):
+    """
+    Return the BLAKE2b digest of a file's content.
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        str: Hex digest of the file content
+    """
+    path, size, mtime = file_fingerprint(file_path)
+    known = _content_hashes.get(path)
+    if known is not None and known[0] == (size, mtime):
+        return known[1]
+    with open(file_path, 'rb') as f:
+        key = stream_hash(f)
+    _content_hashes[path] = ((size, mtime), key)
+    return key
+
+
+def stream_hash(f):
+    """
+    Return the BLAKE2b digest of a binary stream, read block by block from its current position.
+
+    Args:
+        f (file): Binary file-like object
+
+    Returns:
+        str: Hex digest of the remaining content, as computed by content_hash
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def remember_hash(file_path, key):
+    """
+    Record the already known content hash of a file, so content_hash does not read it again.
+
+    Args:
+        file_path (str): Path to the file
+        key (str): Hex digest of its content
+    """
+    path, size, mtime = file_fingerprint(file_path)
+    _content_hashes[path] = ((size, mtime), key)
+
+
+def lookup_key(file_path, cache_dir):
+    """
+    Return the content hash of a file, reusing the one recorded in the manifest
+    when the path, size and mtime are unchanged.
+
+    Args:
+        file_path (str): Path to the source CSV file
+        cache_dir (str): Cache directory
+
+    Returns:
+        str: Content hash used as the cache entry name
+    """
+    path, size, mtime = file_fingerprint(file_path)
+    record = read_manifest(cache_dir).get(path)
+    if record and record['size'] == size and record['mtime_ns'] == mtime:
+        return record['hash']
+    return content_hash(file_path)
+
+
+def load_dataset(file_path, cache_dir=None, mmap_mode=None):
+    """
+    Load the cached arrays of a parsed CSV file.
+
+    Args:
+        file_path (str): Path to the source CSV file
+        cache_dir (str, optional): Cache directory. Defaults to the one next to the file.
+        mmap_mode (str, optional): Memory-map the arrays in this mode ('r') instead of
+            reading them into RAM. Defaults to None.
+
+    Returns:
+        dict: Arrays by name and the entry metadata under 'meta', or None on a cache miss
+    """
+    cache_dir = cache_dir or cache_dir_for(file_path)
+    if not os.path.isdir(cache_dir):
+        return None
+    entry_dir = os.path.join(cache_dir, lookup_key(file_path, cache_dir))
+    try:
+        with open(os.path.join(entry_dir, META_NAME)) as f:
+            meta = json.load(f)
+        if meta.get('format') != FORMAT_VERSION:
+            # Written by an older version: drop it so it gets rebuilt
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        dataset = {
+            name: read_array(os.path.join(entry_dir, f"{name}.bin"), dtype, meta['lengths'][name], mmap_mode)
+            for name, dtype in meta['arrays'].items()
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+    # Mark the entry as recently used for eviction
+    os.utime(entry_dir)
+    dataset['meta'] = meta
+    return dataset
+
+
+def store_dataset(file_path, arrays, meta, cache_dir=None, max_bytes=MAX_CACHE_BYTES):
+    """
+    Save the parsed arrays of a CSV file to the cache.
+
+    Entries are named after the file's content hash and hold one raw binary
+    file per array. They are written to a temporary directory first, so
+    concurrent readers never see a partial entry.
+
+    Args:
+        file_path (str): Path to the source CSV file
+        arrays (dict): Arrays to store, by name
+        meta (dict): JSON-serializable metadata stored with the arrays
+        cache_dir (str, optional): Cache directory. Defaults to the one next to the file.
+        max_bytes (int, optional): Size limit of the cache directory. Defaults to MAX_CACHE_BYTES.
+
+    Returns:
+        str: Path of the cache entry
+    """
+    cache_dir = cache_dir or cache_dir_for(file_path)
+    key = content_hash(file_path)
+    entry_dir = os.path.join(cache_dir, key)
+    if not os.path.isdir(entry_dir):
+        tmp_dir = new_entry_dir(cache_dir, key)
+        for name, array in arrays.items():
+            np.ascontiguousarray(array).tofile(os.path.join(tmp_dir, f"{name}.bin"))
+        meta = {
+            **meta,
+            'arrays': {name: array.dtype.str for name, array in arrays.items()},
+            'lengths': {name: len(array) for name, array in arrays.items()}
+        }
+        publish_entry(tmp_dir, entry_dir, meta)
+    return register_entry(file_path, cache_dir, key, max_bytes)
+
+
+def build_dataset(file_path, cache_dir=None, max_bytes=MAX_CACHE_BYTES, chunksize=CHUNK_SIZE):
+    """
+    Parse a CSV file straight into a cache entry without holding it in RAM.
+
+    Parsed chunks are appended to the entry's files as they arrive and the
+    sorted arrays are produced by an external merge sort, so memory use is
+    bounded by the chunk size rather than the file size. Like Dataset.load,
+    it stops at the end of the last complete line.
+
+    Args:
+        file_path (str): Path to the source CSV file
+        cache_dir (str, optional): Cache directory. Defaults to the one next to the file.
+        max_bytes (int, optional): Size limit of the cache directory. Defaults to MAX_CACHE_BYTES.
+        chunksize (int, optional): Number of rows parsed per chunk. Defaults to CHUNK_SIZE.
+
+    Returns:
+        str: Path of the cache entry
+    """
+    cache_dir = cache_dir or cache_dir_for(file_path)
+    end = complete_length(file_path)
+    key = content_hash(file_path)
+    entry_dir = os.path.join(cache_dir, key)
+    if not os.path.isdir(entry_dir):
+        tmp_dir = new_entry_dir(cache_dir, key)
+        # write_chunks truncates the files, so it can start over with the fallback parser
+        lengths, dropped_rows = parse_columns(
+            file_path, lambda chunks: write_chunks(tmp_dir, chunks), chunksize, byte_range=(0, end)
+        )
+
+        for name, source in (('sorted_values', 'values'), ('sorted_clean_values', 'clean_values')):
+            sort_to_file(
+                read_array(os.path.join(tmp_dir, f"{source}.bin"), np.int64, lengths[source], 'r'),
+                os.path.join(tmp_dir, f"{name}.bin")
+            )
+            lengths[name] = lengths[source]
+        os.remove(os.path.join(tmp_dir, "clean_values.bin"))
+        del lengths['clean_values']
+
+        meta = {
+            'dropped_rows': dropped_rows,
+            'arrays': {
+                'values': np.dtype(np.int64).str,
+                'scams': np.dtype(bool).str,
+                'sorted_values': np.dtype(np.int64).str,
+                'sorted_clean_values': np.dtype(np.int64).str
+            },
+            'lengths': lengths
+        }
+        publish_entry(tmp_dir, entry_dir, meta)
+    return register_entry(file_path, cache_dir, key, max_bytes)
+
+
+def write_chunks(entry_dir, chunks):
+    """
+    Append parsed chunks to the raw value, scam and non-scam value files of an entry.
+
+    Args:
+        entry_dir (str): Directory receiving the files (truncated first)
+        chunks (iterable): (values, scams, dropped_rows) tuples from the loader
+
+    Returns:
+        dict: Number of elements written per array name
+        int: Number of rows skipped as invalid
+    """
+    names = ('values', 'scams', 'clean_values')
+    files = {name: open(os.path.join(entry_dir, f"{name}.bin"), 'wb') for name in names}
+    lengths = dict.fromkeys(names, 0)
+    dropped_rows = 0
+    try:
+        for values, scams, dropped in chunks:
+            clean_values = values[~scams]
+            for name, array in zip(names, (values, scams, clean_values)):
+                array.tofile(files[name])
+                lengths[name] += len(array)
+            dropped_rows += dropped
+    finally:
+        for f in files.values():
+            f.close()
+    return lengths, dropped_rows
+
+
+def read_array(path, dtype, length, mmap_mode=None):
+    """
+    Read a raw binary array, memory-mapped if requested.
+
+    Args:
+        path (str): Path to the raw array file
+        dtype (str): NumPy dtype string of the elements
+        length (int): Number of elements
+        mmap_mode (str, optional): np.memmap mode, or None to read into RAM. Defaults to None.
+
+    Returns:
+        np.ndarray: The array
+    """
+    if mmap_mode and length:
+        return np.memmap(path, dtype=dtype, mode=mmap_mode, shape=(length,))
+    return np.fromfile(path, dtype=dtype, count=length)
+
+
+def new_entry_dir(cache_dir, key):
+    """
+    Create the temporary directory an entry is written to before publishing.
+
+    Args:
+        cache_dir (str): Cache directory
+        key (str): Content hash of the entry
+
+    Returns:
+        str: Path of the temporary directory
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    # Unique per call, as threads of a process may write the same entry at once
+    return tempfile.mkdtemp(prefix=f"{key}.tmp-", dir=cache_dir)
+
+
+def publish_entry(tmp_dir, entry_dir, meta):
+    """
+    Write an entry's metadata and move it into place atomically.
+
+    Args:
+        tmp_dir (str): Temporary directory holding the entry's arrays
+        entry_dir (str): Final path of the entry
+        meta (dict): JSON-serializable metadata of the entry
+    """
+    with open(os.path.join(tmp_dir, META_NAME), 'w') as f:
+        json.dump({**meta, 'format': FORMAT_VERSION}, f)
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # Another process stored the same content first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def register_entry(file_path, cache_dir, key, max_bytes=MAX_CACHE_BYTES):
+    """
+    Record a file version in the manifest and enforce the cache size limit.
+
+    Args:
+        file_path (str): Path to the source CSV file
+        cache_dir (str): Cache directory
+        key (str): Content hash of the entry
+        max_bytes (int, optional): Size limit of the cache directory. Defaults to MAX_CACHE_BYTES.
+
+    Returns:
+        str: Path of the cache entry
+    """
+    path, size, mtime = file_fingerprint(file_path)
+    with manifest_lock(cache_dir):
+        manifest = read_manifest(cache_dir)
+        manifest[path] = {'size': size, 'mtime_ns': mtime, 'hash': key}
+        write_manifest(cache_dir, manifest)
+
+    evict(cache_dir, max_bytes, keep=key)
+    return os.path.join(cache_dir, key)
+
+
+def evict(cache_dir, max_bytes=MAX_CACHE_BYTES, keep=None):
+    """
+    Delete the least recently used entries until the cache fits in max_bytes.
+
+    Args:
+        cache_dir (str): Cache directory
+        max_bytes (int, optional): Size limit of the cache directory. Defaults to MAX_CACHE_BYTES.
+        keep (str, optional): Entry that must not be evicted. Defaults to None.
+
+    Returns:
+        list: Keys of the evicted entries
+    """
+    entries = []
+    for key in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, key)
+        if not os.path.isdir(entry_dir) or '.tmp-' in key:
+            continue
+        size = sum(entry.stat().st_size for entry in os.scandir(entry_dir))
+        entries.append((os.stat(entry_dir).st_mtime, key, size))
+
+    total = sum(size for _, _, size in entries)
+    evicted = []
+    for _, key, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        shutil.rmtree(os.path.join(cache_dir, key), ignore_errors=True)
+        total -= size
+        evicted.append(key)
+
+    if evicted:
+        with manifest_lock(cache_dir):
+            manifest = read_manifest(cache_dir)
+            write_manifest(cache_dir, {
+                path: record for path, record in manifest.items() if record['hash'] not in evicted
+            })
+    return evicted
+
+
+def clear_cache(file_path=None, cache_dir=None):
+    """
+    Invalidate cached datasets.
+
+    Args:
+        file_path (str, optional): Only drop the entry of this file. Defaults to None (whole cache).
+        cache_dir (str, optional): Cache directory. Defaults to the one next to file_path.
+    """
+    if file_path is None and cache_dir is None:
+        raise ValueError("Either file_path or cache_dir is required")
+    if file_path is not None:
+        _content_hashes.pop(os.path.abspath(file_path), None)
+    cache_dir = cache_dir or cache_dir_for(file_path)
+    if not os.path.isdir(cache_dir):
+        return
+
+    if file_path is None:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        return
+
+    path = os.path.abspath(file_path)
+    with manifest_lock(cache_dir):
+        manifest = read_manifest(cache_dir)
+        record = manifest.pop(path, None)
+        keys = {record['hash']} if record else set()
+        if os.path.exists(file_path):
+            # Not content_hash, which would record the hash again for a file being dropped
+            with open(file_path, 'rb') as f:
+                keys.add(stream_hash(f))
+        for key in keys:
+            shutil.rmtree(os.path.join(cache_dir, key), ignore_errors=True)
+        write_manifest(cache_dir, manifest)
+
+
+def read_manifest(cache_dir):
+    """
+    Read the path -> (size, mtime, hash) manifest of a cache directory.
+
+    Args:
+        cache_dir (str): Cache directory
+
+    Returns:
+        dict: Manifest records by absolute source path
+    """
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(cache_dir, manifest):
+    """
+    Atomically replace the manifest of a cache directory.
+
+    Updates must hold manifest_lock, so that concurrent ones are not lost.
+
+    Args:
+        cache_dir (str): Cache directory
+        manifest (dict): Manifest records by absolute source path
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{MANIFEST_NAME}.tmp-", dir=cache_dir)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(cache_dir, MANIFEST_NAME))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@contextlib.contextmanager
+def manifest_lock(cache_dir):
+    """
+    Hold the lock of a cache directory's manifest for a read-modify-write.
+
+    Threads are serialized by a module lock and processes (e.g. the batch
+    runner's workers) by an exclusive lock on a file of the cache directory.
+
+    Args:
+        cache_dir (str): Cache directory
+    """
+    with _manifest_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(cache_dir, LOCK_NAME), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,84 @@
+import os
+import numpy as np
+
+RUN_SIZE = 4 * 1024 * 1024
+
+
+def sort_to_file(source, out_path, run_size=RUN_SIZE):
+    """
+    Sort a 1-D array into a raw binary file using bounded memory.
+
+    The source (typically a np.memmap) is sorted in runs of run_size
+    elements, then the runs are merged pairwise between two scratch files,
+    one block at a time, so at most a few blocks are held in RAM at once.
+
+    Args:
+        source (np.ndarray): Array to sort, read in slices
+        out_path (str): Path of the raw binary file receiving the sorted values
+        run_size (int, optional): Elements sorted or merged in memory at once. Defaults to RUN_SIZE.
+    """
+    n = len(source)
+    if n == 0:
+        open(out_path, 'wb').close()
+        return
+
+    scratch_paths = [f"{out_path}.run0", f"{out_path}.run1"]
+    current = np.memmap(scratch_paths[0], dtype=source.dtype, mode='w+', shape=(n,))
+    for start in range(0, n, run_size):
+        current[start:start + run_size] = np.sort(source[start:start + run_size])
+
+    width = run_size
+    turn = 0
+    while width < n:
+        turn = 1 - turn
+        merged = np.memmap(scratch_paths[turn], dtype=source.dtype, mode='w+', shape=(n,))
+        for start in range(0, n, 2 * width):
+            middle = min(start + width, n)
+            end = min(start + 2 * width, n)
+            merge_into(current[start:middle], current[middle:end], merged[start:end], run_size)
+        current.flush()
+        del current
+        current = merged
+        width *= 2
+
+    current.flush()
+    del current
+    os.replace(scratch_paths[turn], out_path)
+    other = scratch_paths[1 - turn]
+    if os.path.exists(other):
+        os.remove(other)
+
+
+def merge_into(left, right, out, block_size=RUN_SIZE):
+    """
+    Merge two sorted arrays into out, block by block.
+
+    Each step takes the next block of both inputs and emits every element up
+    to the smaller of the two block maxima, which is guaranteed to be final.
+
+    Args:
+        left (np.ndarray): First sorted input
+        right (np.ndarray): Second sorted input
+        out (np.ndarray): Output with room for len(left) + len(right) elements
+        block_size (int, optional): Elements read from each input per step. Defaults to RUN_SIZE.
+    """
+    i = j = k = 0
+    while i < len(left) and j < len(right):
+        left_block = np.asarray(left[i:i + block_size])
+        right_block = np.asarray(right[j:j + block_size])
+        limit = min(left_block[-1], right_block[-1])
+        n_left = int(np.searchsorted(left_block, limit, side='right'))
+        n_right = int(np.searchsorted(right_block, limit, side='right'))
+        block = np.concatenate((left_block[:n_left], right_block[:n_right]))
+        block.sort(kind='stable')
+        out[k:k + len(block)] = block
+        i += n_left
+        j += n_right
+        k += len(block)
+
+    # One side is exhausted: copy what is left of the other in blocks
+    for rest, start in ((left, i), (right, j)):
+        for offset in range(start, len(rest), block_size):
+            block = rest[offset:offset + block_size]
+            out[k:k + len(block)] = block
+            k += len(block)
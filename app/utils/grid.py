@@ -0,0 +1,117 @@
+import numpy as np
+
+
+def grid_axes(x_range, y_range, step):
+    """
+    Return the x and y thresholds of the optimization grid.
+
+    x goes from x_range[0] to x_range[1] and y from x_range[0] + step to
+    y_range[1], so both axes share the thresholds x_range[0] + k * step and
+    column j is above row i exactly when j >= i.
+
+    Args:
+        x_range (tuple): Range for x values as (min, max)
+        y_range (tuple): Range for y values as (min, max)
+        step (int): Step size of the grid
+
+    Returns:
+        np.ndarray: x values of the grid rows
+        np.ndarray: y values of the grid columns
+    """
+    x_values = np.arange(x_range[0], x_range[1] + 1, step, dtype=np.int64)
+    y_values = np.arange(x_range[0] + step, y_range[1] + 1, step, dtype=np.int64)
+    return x_values, y_values
+
+
+def expected_values(x_values, y_values, x_counts, y_counts, stop_loss):
+    """
+    Compute expected values elementwise from survival counts.
+
+    Uses the same operations, in the same order, as
+    InvestmentAnalyzer.find_value, so results are bit-identical. Inputs
+    broadcast against each other.
+
+    Args:
+        x_values (np.ndarray): x thresholds
+        y_values (np.ndarray): y thresholds
+        x_counts (np.ndarray): Count of values above each x
+        y_counts (np.ndarray): Count of values above each y
+        stop_loss (float): Loss value in case of failure
+
+    Returns:
+        np.ndarray: Expected value of each (x, y) pair
+    """
+    shape = np.broadcast_shapes(np.shape(x_values), np.shape(y_values))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.divide(y_counts, x_counts, out=np.zeros(shape), where=x_counts > 0)
+        multiplier = y_values / x_values
+        return rate * multiplier + (1 - rate) * stop_loss
+
+
+def expected_value_grid(x_values, y_values, x_counts, y_counts, stop_loss, row_offset=0):
+    """
+    Compute the expected value of every (x, y) pair of the grid from survival counts.
+
+    Args:
+        x_values (np.ndarray): x thresholds of the rows
+        y_values (np.ndarray): y thresholds of the columns
+        x_counts (np.ndarray): Count of values above each x
+        y_counts (np.ndarray): Count of values above each y
+        stop_loss (float): Loss value in case of failure
+        row_offset (int, optional): Index of the first row in the full grid, when computing
+            a block of rows. Defaults to 0.
+
+    Returns:
+        np.ndarray: Expected values, shape (len(x), len(y)), NaN where y <= x
+    """
+    values = expected_values(
+        x_values[:, np.newaxis], y_values[np.newaxis, :],
+        x_counts[:, np.newaxis], y_counts[np.newaxis, :],
+        stop_loss
+    )
+    # Column j holds y = x_min + (j + 1) * step, which is above row i only when j >= i
+    values[np.tri(len(x_values), len(y_values), k=row_offset - 1, dtype=bool)] = np.nan
+    return values
+
+
+def grid_size(x_range, y_range, step):
+    """
+    Count the (x, y) pairs an exhaustive search evaluates.
+
+    Args:
+        x_range (tuple): Range for x values as (min, max)
+        y_range (tuple): Range for y values as (min, max)
+        step (int): Step size of the grid
+
+    Returns:
+        int: Number of valid grid pairs
+    """
+    x_values, y_values = grid_axes(x_range, y_range, step)
+    return int(np.maximum(len(y_values) - np.arange(len(x_values)), 0).sum())
+
+
+def best_in_rows(x_values, y_values, values, start, stop, best=None):
+    """
+    Return the best pair among a block of rows of the grid and a previous best.
+
+    Used to report the best pair found so far while a grid is computed block
+    by block. Ties keep the previous best.
+
+    Args:
+        x_values (np.ndarray): x values of the grid rows
+        y_values (np.ndarray): y values of the grid columns
+        values (np.ndarray): Expected-value grid, filled at least for rows [start, stop)
+        start (int): First row of the block
+        stop (int): Row after the last row of the block
+        best (tuple, optional): Previous best (x, y, value). Defaults to None.
+
+    Returns:
+        tuple: Best (x, y, value), or best if the block has no valid pair
+    """
+    block = values[start:stop]
+    if not np.isfinite(block).any():
+        return best
+    i, j = np.unravel_index(np.nanargmax(block), block.shape)
+    if best is not None and block[i, j] <= best[2]:
+        return best
+    return int(x_values[start + i]), int(y_values[j]), float(block[i, j])
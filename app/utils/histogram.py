@@ -0,0 +1,81 @@
+import numpy as np
+
+SCALES = ('linear', 'log')
+
+
+def histogram_edges(low, high, bins, scale='linear'):
+    """
+    Return the bin edges of a histogram over [low, high].
+
+    Args:
+        low (float): Left edge of the first bin
+        high (float): Right edge of the last bin
+        bins (int): Number of bins
+        scale (str, optional): 'linear' for equal widths, 'log' for equal ratios. Defaults to 'linear'.
+
+    Returns:
+        np.ndarray: bins + 1 increasing edges
+    """
+    if scale not in SCALES:
+        raise ValueError(f"Unknown histogram scale: {scale}")
+    if bins < 1:
+        raise ValueError("A histogram needs at least one bin")
+    if scale == 'log':
+        if low <= 0:
+            raise ValueError("Log-scale bins need a positive lower bound")
+        return np.geomspace(low, high, bins + 1)
+    return np.linspace(low, high, bins + 1)
+
+
+def bin_counts(sorted_values, edges):
+    """
+    Count sorted values per bin, like np.histogram but with binary searches.
+
+    Bins are half-open [edge, next edge) except the last, which includes its
+    right edge. The cost is O(bins * log n) whatever the number of values.
+
+    Args:
+        sorted_values (np.ndarray): Values sorted ascending
+        edges (np.ndarray): Increasing bin edges
+
+    Returns:
+        np.ndarray: Count of values in each bin
+    """
+    edges = np.asarray(edges)
+    last_edge = edges[-1]
+    if np.issubdtype(sorted_values.dtype, np.integer):
+        # Searching float keys would cast the whole array; for integers,
+        # value >= edge is value >= ceil(edge) and value <= edge is value <= floor(edge)
+        last_edge = np.floor(last_edge).astype(sorted_values.dtype)
+        edges = np.ceil(edges).astype(sorted_values.dtype)
+    positions = np.searchsorted(sorted_values, edges, side='left')
+    positions[-1] = np.searchsorted(sorted_values, last_edge, side='right')
+    return np.diff(positions)
+
+
+def compute_histogram(sorted_values, sorted_clean_values, bins, value_range, scale='linear'):
+    """
+    Bin the values of a dataset, split into scam and non-scam entries.
+
+    Args:
+        sorted_values (np.ndarray): All values sorted ascending
+        sorted_clean_values (np.ndarray): Non-scam values sorted ascending
+        bins (int): Number of bins
+        value_range (tuple): (low, high) covered by the bins; values outside are not counted
+        scale (str, optional): 'linear' or 'log' bins. Defaults to 'linear'.
+
+    Returns:
+        dict: 'edges', and the 'counts', 'clean_counts' and 'scam_counts' of each bin
+    """
+    low, high = value_range
+    if high <= low:
+        raise ValueError("The histogram range must be increasing")
+    edges = histogram_edges(low, high, bins, scale)
+    counts = bin_counts(sorted_values, edges)
+    clean_counts = bin_counts(sorted_clean_values, edges)
+    return {
+        'edges': edges,
+        'counts': counts,
+        'clean_counts': clean_counts,
+        'scam_counts': counts - clean_counts
+    }
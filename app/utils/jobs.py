@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from utils.perf import background_context
+from utils.surface import Surface
+
+JOB_THREADS = 2
+MAX_FINISHED_JOBS = 32
+
+# (file path, method, ranges, step, stop_loss, with_scam) -> OptimizationJob, oldest first
+_jobs = OrderedDict()
+_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    """
+    Raised from a job's progress callback to stop its computation.
+    """
+
+
+class OptimizationJob:
+    """
+    An optimization sweep running in a background thread.
+
+    Identical requests share one job: every session asking for the same
+    search on the same dataset snapshot subscribes to it, reads its progress, best
+    pair so far and result, and the computation only stops early when every
+    subscriber cancelled. The sweep reports progress through the callbacks
+    of InvestmentAnalyzer.evaluate_grid and adaptive_search, and its result
+    lands in the dataset's shared caches like a synchronous run.
+    """
+
+    def __init__(self, key, analyzer, x_range, y_range, step, method='exhaustive', workers=1):
+        """
+        Initialize a pending job; it is started by submit_optimization.
+
+        Args:
+            key (tuple): Key identifying identical requests
+            analyzer (InvestmentAnalyzer): Analyzer holding the data and stop_loss/with_scam
+            x_range (tuple): Range for x values as (min, max)
+            y_range (tuple): Range for y values as (min, max)
+            step (int): Step size of the grid
+            method (str, optional): 'exhaustive' or 'adaptive'. Defaults to 'exhaustive'.
+            workers (int, optional): Processes sharing an exhaustive sweep. Defaults to 1.
+        """
+        self.key = key
+        self.analyzer = analyzer
+        self.x_range = x_range
+        self.y_range = y_range
+        self.step = step
+        self.method = method
+        self.workers = workers
+        self.state = 'pending'
+        self.progress = 0.0
+        self.best = None
+        self.result = None
+        self.error = None
+        self.subscribers = 0
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+
+    @property
+    def done(self):
+        """
+        bool: Whether the job ended, successfully or not.
+        """
+        return self.state in ('done', 'cancelled', 'failed')
+
+    @property
+    def elapsed(self):
+        """
+        float: Seconds the job has been running, or ran, 0 before it starts.
+        """
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def cancel(self):
+        """
+        Withdraw one subscriber; the computation stops once none is left.
+        """
+        with _lock:
+            self.subscribers -= 1
+            if self.subscribers <= 0 and not self.done:
+                self._cancel.set()
+
+    def run(self):
+        """
+        Run the search, recording its state, progress and result.
+        """
+        if self._cancel.is_set():
+            self.state = 'cancelled'
+            return
+        self.state = 'running'
+        self.started = time.time()
+        search = dict(x_range=self.x_range, y_range=self.y_range, step=self.step, progress=self.report)
+        try:
+            if self.method == 'adaptive':
+                result = self.analyzer.adaptive_search(**search)
+                self.result = {'optimum': result['optimum'], 'search': result}
+            else:
+                grid = self.analyzer.evaluate_grid(workers=self.workers, **search)
+                self.result = {'optimum': Surface(*grid).optimum(), 'search': None}
+            self.progress = 1.0
+            self.state = 'done'
+        except JobCancelled:
+            self.state = 'cancelled'
+        except Exception as e:
+            self.error = e
+            self.state = 'failed'
+        finally:
+            self.finished = time.time()
+
+    def report(self, done, total, best):
+        """
+        Progress callback of the search.
+
+        Args:
+            done (int): Units of work finished
+            total (int): Units of work of the whole search
+            best (tuple): Best (x, y, value) found so far, or None
+
+        Raises:
+            JobCancelled: If every subscriber cancelled the job
+        """
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.progress = done / total if total else 1.0
+        self.best = best
+
+
+def submit_optimization(analyzer, x_range, y_range, step, method='exhaustive', workers=1):
+    """
+    Start an optimization in the background, or join the identical one already running.
+
+    A job started on an older snapshot of the same file is not joined: a new
+    job replaces it under the key, and it keeps running for its subscribers.
+
+    Args:
+        analyzer (InvestmentAnalyzer): Analyzer holding the data and stop_loss/with_scam
+        x_range (tuple): Range for x values as (min, max)
+        y_range (tuple): Range for y values as (min, max)
+        step (int): Step size of the grid
+        method (str, optional): 'exhaustive' or 'adaptive'. Defaults to 'exhaustive'.
+        workers (int, optional): Processes sharing an exhaustive sweep. Defaults to 1.
+
+    Returns:
+        OptimizationJob: The job, with this caller subscribed to it
+    """
+    if method not in ('exhaustive', 'adaptive'):
+        raise ValueError(f"Unknown search method: {method}")
+    key = job_key(analyzer, x_range, y_range, step, method)
+    with _lock:
+        job = _jobs.get(key)
+        if (job is None or job.state in ('cancelled', 'failed') or job._cancel.is_set()
+                or job.analyzer.dataset is not analyzer.dataset):
+            job = OptimizationJob(key, analyzer, tuple(x_range), tuple(y_range), step, method, workers)
+            _jobs[key] = job
+            # Spans of the sweep are recorded on the performance panel of the session starting it
+            get_executor().submit(background_context().run, job.run)
+        _jobs.move_to_end(key)
+        job.subscribers += 1
+        prune()
+    return job
+
+
+def job_key(analyzer, x_range, y_range, step, method='exhaustive'):
+    """
+    Return the key identifying identical optimization requests.
+
+    The data is identified by its file, so the key of a request does not
+    change when the file is reloaded.
+
+    Args:
+        analyzer (InvestmentAnalyzer): Analyzer holding the data and stop_loss/with_scam
+        x_range (tuple): Range for x values as (min, max)
+        y_range (tuple): Range for y values as (min, max)
+        step (int): Step size of the grid
+        method (str, optional): 'exhaustive' or 'adaptive'. Defaults to 'exhaustive'.
+
+    Returns:
+        tuple: (file path, method, x range, y range, step, stop_loss, with_scam); datasets
+            without a file are identified by their id instead
+    """
+    dataset = analyzer.dataset
+    source = id(dataset) if dataset.file_path is None else os.path.abspath(dataset.file_path)
+    # The number of workers does not change the result
+    return (
+        source, method, tuple(x_range), tuple(y_range), step,
+        analyzer.stop_loss, analyzer.with_scam
+    )
+
+
+def prune(max_finished=MAX_FINISHED_JOBS):
+    """
+    Forget the oldest finished jobs beyond max_finished.
+
+    Must be called with the job lock held. Their results stay in the
+    datasets' caches.
+
+    Args:
+        max_finished (int, optional): Finished jobs to keep. Defaults to MAX_FINISHED_JOBS.
+    """
+    finished = [key for key, job in _jobs.items() if job.done]
+    for key in finished[:max(len(finished) - max_finished, 0)]:
+        del _jobs[key]
+
+
+def get_executor():
+    """
+    Return the process-wide thread pool running the jobs.
+
+    Returns:
+        ThreadPoolExecutor: The shared executor
+    """
+    global _executor
+    # Its own lock, as submit_optimization calls it with the job lock held
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_THREADS, thread_name_prefix='optimization')
+        return _executor
@@ -0,0 +1,352 @@
+import csv
+import io
+import os
+import warnings
+import numpy as np
+
+VALUE_COLUMN = 2
+SCAM_COLUMN = 17
+CHUNK_SIZE = 250000
+ANCHOR_SIZE = 4096
+SCAN_BLOCK_SIZE = 64 * 1024
+INT64_MIN = int(np.iinfo(np.int64).min)
+INT64_MAX = int(np.iinfo(np.int64).max)
+
+
+def read_csv_columns(file_path, chunksize=CHUNK_SIZE, byte_range=None):
+    """
+    Load the value and scam columns of a `;`-delimited latin-1 CSV file.
+
+    Only columns 2 and 17 are parsed, chunk by chunk, into typed arrays.
+    Rows whose value is not an integer or that have no scam column
+    (headers, truncated lines) are skipped, as with the former csv.reader
+    loop; an empty scam field is kept as not a scam. Values beyond the
+    int64 range, which int() accepted, are clipped to it with a warning.
+
+    Args:
+        file_path (str): Path to the CSV file to load
+        chunksize (int, optional): Number of rows parsed per chunk. Defaults to CHUNK_SIZE.
+        byte_range (tuple, optional): Only parse the bytes from start to stop, which must
+            begin and end on line boundaries. Defaults to None (whole file).
+
+    Returns:
+        np.ndarray: int64 values from the third column
+        np.ndarray: bool scam flags, True where the 18th column is "True"
+        int: Number of rows skipped as invalid
+    """
+    if byte_range is not None and byte_range[1] <= byte_range[0]:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=bool), 0
+    return parse_columns(file_path, concat_chunks, chunksize, byte_range)
+
+
+def parse_columns(file_path, consume, chunksize=CHUNK_SIZE, byte_range=None):
+    """
+    Feed the parsed chunks of a CSV file to consume, with the fastest parser that accepts it.
+
+    The chunks come from the pandas C parser, or from csv.reader when the C
+    parser rejects the layout (ValueError or IndexError). The rejection may come after some chunks were
+    consumed, so consume is then called again from the start and must not
+    keep anything from its first call.
+
+    Args:
+        file_path (str): Path to the CSV file
+        consume (callable): Called with an iterator of (values, scams, dropped_rows) chunks
+        chunksize (int, optional): Number of rows parsed per chunk. Defaults to CHUNK_SIZE.
+        byte_range (tuple, optional): Only parse the bytes from start to stop. Defaults to None.
+
+    Returns:
+        What consume returns
+    """
+    try:
+        return consume(iter_columns_chunked(file_path, chunksize, byte_range))
+    except (ValueError, IndexError):
+        # The C parser rejects some ragged layouts; a short first line even fails
+        # with IndexError, as pandas sizes the columns from it
+        return consume(iter_columns_rowwise(file_path, chunksize, byte_range))
+
+
+def read_csv_tail(file_path, offset, chunksize=CHUNK_SIZE):
+    """
+    Load the value and scam columns of the complete lines appended after offset.
+
+    A last line without its newline is still being written and is left for
+    the next call, so the returned offset always falls on a line boundary.
+
+    Args:
+        file_path (str): Path to the CSV file
+        offset (int): Byte offset up to which the file was already parsed
+        chunksize (int, optional): Number of rows parsed per chunk. Defaults to CHUNK_SIZE.
+
+    Returns:
+        np.ndarray: int64 values of the new rows
+        np.ndarray: bool scam flags of the new rows
+        int: Number of new rows skipped as invalid
+        int: Byte offset up to which the file is now parsed
+    """
+    end = complete_length(file_path, start=offset)
+    values, scams, dropped_rows = read_csv_columns(file_path, chunksize, byte_range=(offset, end))
+    return values, scams, dropped_rows, end
+
+
+def complete_length(file_path, size=None, start=0):
+    """
+    Return the length of a file up to the end of its last complete line.
+
+    Only the end of the file is read, block by block, back to the last newline.
+
+    Args:
+        file_path (str): Path to the file
+        size (int, optional): Length of the file to consider. Defaults to its current size.
+        start (int, optional): Offset known to be a line boundary; the search stops there.
+            Defaults to 0.
+
+    Returns:
+        int: Offset just after the last newline, or start if there is none after it
+    """
+    if size is None:
+        size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        position = size
+        while position > start:
+            block_start = max(position - SCAN_BLOCK_SIZE, start)
+            f.seek(block_start)
+            newline = f.read(position - block_start).rfind(b'\n')
+            if newline >= 0:
+                return block_start + newline + 1
+            position = block_start
+    return start
+
+
+def read_anchor(file_path, offset, size=ANCHOR_SIZE):
+    """
+    Return the bytes just before an offset, to check later that they did not change.
+
+    Args:
+        file_path (str): Path to the file
+        offset (int): End of the anchor
+        size (int, optional): Maximum length of the anchor. Defaults to ANCHOR_SIZE.
+
+    Returns:
+        bytes: Up to size bytes ending at offset (fewer if the file is shorter)
+    """
+    start = max(offset - size, 0)
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        return f.read(offset - start)
+
+
+def open_range(file_path, byte_range=None):
+    """
+    Open a file in binary mode, limited to a range of bytes if given.
+
+    Args:
+        file_path (str): Path to the file
+        byte_range (tuple, optional): (start, stop) offsets to read. Defaults to None (whole file).
+
+    Returns:
+        io.BufferedReader: Binary file positioned at start that ends at stop
+    """
+    f = open(file_path, 'rb')
+    if byte_range is None:
+        return f
+    f.seek(byte_range[0])
+    return io.BufferedReader(ByteRangeReader(f, byte_range[1] - byte_range[0]))
+
+
+class ByteRangeReader(io.RawIOBase):
+    """
+    Raw reader returning at most a fixed number of bytes of an open file.
+
+    Lets the parsers read a slice of a file that keeps growing, or only the
+    part appended since the last read, without copying it first.
+    """
+
+    def __init__(self, f, length):
+        """
+        Wrap an open binary file.
+
+        Args:
+            f (file): Binary file positioned at the first byte to read
+            length (int): Number of bytes to return before reporting end of file
+        """
+        self._file = f
+        self._remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._file.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def iter_columns_chunked(file_path, chunksize=CHUNK_SIZE, byte_range=None):
+    """
+    Parse the value and scam columns with the pandas C parser, chunk by chunk.
+
+    Args:
+        file_path (str): Path to the CSV file to load
+        chunksize (int, optional): Number of rows parsed per chunk. Defaults to CHUNK_SIZE.
+        byte_range (tuple, optional): Only parse the bytes from start to stop. Defaults to None.
+
+    Yields:
+        tuple: (int64 values, bool scam flags, number of rows skipped) for each chunk
+
+    Raises:
+        ValueError: If the file layout cannot be parsed column-wise, or a valid row has
+            an empty scam field, which the C parser cannot tell from a missing one
+    """
+    # Loads from the dataset cache never parse, so pandas is only imported here
+    import pandas as pd
+
+    with open_range(file_path, byte_range) as source:
+        reader = pd.read_csv(
+            source,
+            sep=';',
+            encoding='latin-1',
+            header=None,
+            usecols=[VALUE_COLUMN, SCAM_COLUMN],
+            dtype={SCAM_COLUMN: str},
+            na_filter=False,
+            chunksize=chunksize
+        )
+        with reader, warnings.catch_warnings():
+            # Header rows mix strings into the value column; they are filtered below
+            warnings.simplefilter('ignore', pd.errors.DtypeWarning)
+            for chunk in reader:
+                value_column = chunk[VALUE_COLUMN]
+                if value_column.dtype.kind == 'i':
+                    values = value_column.to_numpy(dtype=np.int64)
+                    valid = np.ones(len(values), dtype=bool)
+                elif pd.api.types.is_string_dtype(value_column.dtype):
+                    # Chunk holds headers or junk: the C parser kept the raw strings
+                    values, valid = parse_int_column(value_column.to_numpy())
+                else:
+                    # Floats would hide which fields int() rejects
+                    raise ValueError(f"Column {VALUE_COLUMN} cannot be read as integers")
+                scam_column = chunk[SCAM_COLUMN].to_numpy()
+                # Missing fields are read as empty strings too, so only csv.reader can tell
+                # an empty scam field (not a scam) from a missing one (invalid row)
+                if np.any(valid & (scam_column == '')):
+                    raise ValueError(f"Column {SCAM_COLUMN} is empty or missing in valid rows")
+                yield values[valid], (scam_column == "True")[valid], int(len(valid) - np.count_nonzero(valid))
+
+
+def iter_columns_rowwise(file_path, chunksize=CHUNK_SIZE, byte_range=None):
+    """
+    Parse the value and scam columns row by row with csv.reader.
+
+    Slower than iter_columns_chunked but accepts any row layout.
+
+    Args:
+        file_path (str): Path to the CSV file to load
+        chunksize (int, optional): Number of rows per yielded chunk. Defaults to CHUNK_SIZE.
+        byte_range (tuple, optional): Only parse the bytes from start to stop. Defaults to None.
+
+    Yields:
+        tuple: (int64 values, bool scam flags, number of rows skipped) for each chunk
+    """
+    values = []
+    scams = []
+    dropped_rows = 0
+    clipped = 0
+    with io.TextIOWrapper(open_range(file_path, byte_range), encoding='latin-1', newline='') as csv_file:
+        for row in csv.reader(csv_file, delimiter=';'):
+            if not row:
+                continue
+            try:
+                value = int(row[VALUE_COLUMN])
+                scam = row[SCAM_COLUMN]
+            except (ValueError, IndexError):
+                # Skip headers or invalid rows
+                dropped_rows += 1
+                continue
+            if not INT64_MIN <= value <= INT64_MAX:
+                value = min(max(value, INT64_MIN), INT64_MAX)
+                clipped += 1
+            values.append(value)
+            scams.append(scam == "True")
+            if len(values) == chunksize:
+                yield np.array(values, dtype=np.int64), np.array(scams, dtype=bool), dropped_rows
+                values, scams, dropped_rows = [], [], 0
+    warn_clipped(clipped)
+    yield np.array(values, dtype=np.int64), np.array(scams, dtype=bool), dropped_rows
+
+
+def concat_chunks(chunks):
+    """
+    Concatenate the chunks yielded by the column iterators.
+
+    Args:
+        chunks (iterable): (values, scams, dropped_rows) tuples
+
+    Returns:
+        np.ndarray: int64 values
+        np.ndarray: bool scam flags
+        int: Number of rows skipped as invalid
+    """
+    values_chunks = [np.empty(0, dtype=np.int64)]
+    scams_chunks = [np.empty(0, dtype=bool)]
+    dropped_rows = 0
+    for values, scams, dropped in chunks:
+        values_chunks.append(values)
+        scams_chunks.append(scams)
+        dropped_rows += dropped
+    return np.concatenate(values_chunks), np.concatenate(scams_chunks), dropped_rows
+
+
+def parse_int_column(raw):
+    """
+    Convert an object array of strings to int64, flagging entries int() rejects.
+
+    Integers beyond the int64 range are clipped to it, with a warning.
+
+    Args:
+        raw (np.ndarray): Object array of strings
+
+    Returns:
+        np.ndarray: int64 values, 0 where parsing failed
+        np.ndarray: bool mask of successfully parsed entries
+    """
+    try:
+        # Fast path: every entry of the chunk is a valid integer
+        return raw.astype(np.int64), np.ones(len(raw), dtype=bool)
+    except (ValueError, TypeError, OverflowError):
+        pass
+
+    values = np.zeros(len(raw), dtype=np.int64)
+    valid = np.zeros(len(raw), dtype=bool)
+    clipped = 0
+    for i, item in enumerate(raw):
+        try:
+            value = int(item)
+        except (ValueError, TypeError):
+            # Skip headers or invalid rows
+            continue
+        if not INT64_MIN <= value <= INT64_MAX:
+            value = min(max(value, INT64_MIN), INT64_MAX)
+            clipped += 1
+        values[i] = value
+        valid[i] = True
+    warn_clipped(clipped)
+    return values, valid
+
+
+def warn_clipped(count):
+    """
+    Warn that parsed values were clipped to the int64 range.
+
+    Args:
+        count (int): Number of clipped values; nothing is reported when 0
+    """
+    if count:
+        warnings.warn(f"{count} values beyond the int64 range were clipped to it", RuntimeWarning, stacklevel=2)
@@ -0,0 +1,111 @@
+import numpy as np
+
+CHUNK_ROWS = 1000000
+
+
+def is_filtered(scam_filter=None, value_range=None):
+    """
+    Tell whether the sample filters exclude any row.
+
+    Args:
+        scam_filter (bool, optional): See filter_mask. Defaults to None.
+        value_range (tuple, optional): See filter_mask. Defaults to None.
+
+    Returns:
+        bool: False when every row matches
+    """
+    return scam_filter is not None or (value_range is not None and any(bound is not None for bound in value_range))
+
+
+def filter_mask(values, scams, scam_filter=None, value_range=None):
+    """
+    Select the rows of a chunk matching the sample filters.
+
+    Args:
+        values (np.ndarray): Values of the chunk
+        scams (np.ndarray): Scam flags of the chunk
+        scam_filter (bool, optional): True keeps scam rows only, False non-scam rows only.
+            Defaults to None (both).
+        value_range (tuple, optional): Inclusive (low, high) bounds on the value, either of which
+            may be None. Defaults to None (any value).
+
+    Returns:
+        np.ndarray: bool mask of the matching rows, or None when nothing is filtered
+    """
+    mask = None
+    if scam_filter is not None:
+        mask = scams if scam_filter else ~scams
+    if value_range is not None:
+        low, high = value_range
+        if low is not None:
+            mask = values >= low if mask is None else mask & (values >= low)
+        if high is not None:
+            mask = values <= high if mask is None else mask & (values <= high)
+    return mask
+
+
+def chunk_match_counts(values, scams, scam_filter=None, value_range=None, chunk_rows=CHUNK_ROWS):
+    """
+    Count the matching rows of each chunk of the data.
+
+    Masks are built one chunk at a time, so memory use is bounded by the
+    chunk size rather than by the number of rows.
+
+    Args:
+        values (np.ndarray): All values
+        scams (np.ndarray): All scam flags
+        scam_filter (bool, optional): See filter_mask. Defaults to None.
+        value_range (tuple, optional): See filter_mask. Defaults to None.
+        chunk_rows (int, optional): Rows per chunk. Defaults to CHUNK_ROWS.
+
+    Returns:
+        np.ndarray: Count of matching rows in each chunk
+    """
+    counts = []
+    for start in range(0, len(values), chunk_rows):
+        stop = start + chunk_rows
+        mask = filter_mask(values[start:stop], scams[start:stop], scam_filter, value_range)
+        counts.append(len(values[start:stop]) if mask is None else int(np.count_nonzero(mask)))
+    return np.array(counts, dtype=np.int64)
+
+
+def read_page(values, scams, match_counts, page, page_size, scam_filter=None, value_range=None, chunk_rows=CHUNK_ROWS):
+    """
+    Materialize one page of the matching rows.
+
+    Only the chunks overlapping the page are scanned. Without filters the
+    page is a slice of the arrays and nothing is copied.
+
+    Args:
+        values (np.ndarray): All values
+        scams (np.ndarray): All scam flags
+        match_counts (np.ndarray): Result of chunk_match_counts for the same filters and chunk size
+        page (int): Page number, starting at 0
+        page_size (int): Rows per page
+        scam_filter (bool, optional): See filter_mask. Defaults to None.
+        value_range (tuple, optional): See filter_mask. Defaults to None.
+        chunk_rows (int, optional): Rows per chunk. Defaults to CHUNK_ROWS.
+
+    Returns:
+        np.ndarray: Row numbers of the page in the data
+        np.ndarray: Values of the page
+        np.ndarray: Scam flags of the page
+    """
+    first = page * page_size
+    last = first + page_size
+    if not is_filtered(scam_filter, value_range):
+        rows = np.arange(first, min(last, len(values)))
+        return rows, values[first:last], scams[first:last]
+
+    # Matches before each chunk tell which chunks hold the page
+    ends = np.cumsum(match_counts)
+    starts = ends - match_counts
+    rows = []
+    for chunk in np.flatnonzero((ends > first) & (starts < last)):
+        chunk_start = int(chunk) * chunk_rows
+        chunk_stop = chunk_start + chunk_rows
+        mask = filter_mask(values[chunk_start:chunk_stop], scams[chunk_start:chunk_stop], scam_filter, value_range)
+        matches = np.flatnonzero(mask) + chunk_start
+        rows.append(matches[max(first - starts[chunk], 0):last - starts[chunk]])
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    return rows, values[rows], scams[rows]
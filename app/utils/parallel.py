@@ -0,0 +1,264 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+from utils.grid import grid_axes, expected_value_grid, best_in_rows
+
+BLOCKS_PER_WORKER = 4
+
+# Worker start-up (interpreter, NumPy import) costs far more than a block of
+# rows, so pools are kept per process and reused across sweeps. There is one
+# per worker count: replacing a pool would break the sweeps of other sessions
+# still submitting to it.
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def evaluate_grid_parallel(sorted_values, x_range, y_range, step, stop_loss, workers=None, progress=None):
+    """
+    Compute the expected-value grid across worker processes.
+
+    The x-axis is split into row blocks of roughly equal work. Workers read
+    the sorted values from shared memory (or from the same memory-mapped
+    file) and write their rows straight into a shared output matrix, so
+    neither the data nor the grid is pickled. Results are identical to the
+    serial computation.
+
+    Args:
+        sorted_values (np.ndarray): Values sorted ascending (scam filtering already applied)
+        x_range (tuple): Range for x values as (min, max)
+        y_range (tuple): Range for y values as (min, max)
+        step (int): Step size of the grid
+        stop_loss (float): Loss value in case of failure
+        workers (int, optional): Number of processes. Defaults to os.cpu_count().
+        progress (callable, optional): Called as progress(done, total, best) each time a block
+            of rows is finished, with the best (x, y, value) found so far. It may raise to
+            stop the sweep; blocks not started yet are then cancelled. Defaults to None.
+
+    Returns:
+        np.ndarray: x values of the grid rows
+        np.ndarray: y values of the grid columns
+        np.ndarray: Expected values, shape (len(x), len(y)), NaN where y <= x
+        np.ndarray: Count of values above each x
+        np.ndarray: Count of values above each y
+    """
+    workers = workers or os.cpu_count()
+    x_values, y_values = grid_axes(x_range, y_range, step)
+    shape = (len(x_values), len(y_values))
+    x_counts = len(sorted_values) - np.searchsorted(sorted_values, x_values, side='right')
+    y_counts = len(sorted_values) - np.searchsorted(sorted_values, y_values, side='right')
+
+    source, input_memory = share_array(sorted_values)
+    output_memory = shared_memory.SharedMemory(create=True, size=max(shape[0] * shape[1] * 8, 1))
+    try:
+        for attempt in range(2):
+            pool = get_pool(workers)
+            try:
+                values = sweep_blocks(
+                    pool, source, output_memory, shape, x_values, y_values, x_range, y_range, step, stop_loss,
+                    workers, progress
+                )
+                break
+            except BrokenProcessPool:
+                # A worker died (e.g. killed when out of memory) and the pool can no
+                # longer run anything: replace it, and retry the sweep once
+                discard_pool(pool)
+                if attempt:
+                    raise
+    finally:
+        output_memory.close()
+        output_memory.unlink()
+        if input_memory is not None:
+            input_memory.close()
+            input_memory.unlink()
+    return x_values, y_values, values, x_counts, y_counts
+
+
+def sweep_blocks(pool, source, output_memory, shape, x_values, y_values, x_range, y_range, step, stop_loss,
+                 workers, progress=None):
+    """
+    Run the row blocks of a sweep on a pool and return the filled grid.
+
+    Args:
+        pool (ProcessPoolExecutor): Worker pool
+        source (tuple): Description of the shared sorted values, from share_array
+        output_memory (SharedMemory): Shared output matrix
+        shape (tuple): Shape of the grid
+        x_values (np.ndarray): x values of the grid rows
+        y_values (np.ndarray): y values of the grid columns
+        x_range (tuple): Range for x values as (min, max)
+        y_range (tuple): Range for y values as (min, max)
+        step (int): Step size of the grid
+        stop_loss (float): Loss value in case of failure
+        workers (int): Number of processes
+        progress (callable, optional): Progress callback of evaluate_grid_parallel. Defaults to None.
+
+    Returns:
+        np.ndarray: Copy of the expected values
+
+    Raises:
+        BrokenProcessPool: If a worker process died
+    """
+    blocks = {
+        pool.submit(evaluate_rows, source, output_memory.name, shape, x_range, y_range, step, stop_loss, start, stop): (start, stop)
+        for start, stop in row_blocks(shape[0], shape[1], workers * BLOCKS_PER_WORKER)
+    }
+    output = np.ndarray(shape, dtype=np.float64, buffer=output_memory.buf)
+    try:
+        best = None
+        for done, future in enumerate(as_completed(blocks), 1):
+            future.result()
+            if progress is not None:
+                best = best_in_rows(x_values, y_values, output, *blocks[future], best)
+                progress(done, len(blocks), best)
+        return output.copy()
+    finally:
+        # The view and the workers must be done with the shared blocks before they are closed
+        del output
+        for future in blocks:
+            future.cancel()
+        wait(blocks)
+
+
+def evaluate_rows(source, output_name, shape, x_range, y_range, step, stop_loss, start, stop):
+    """
+    Worker: compute rows [start, stop) of the grid into the shared output matrix.
+
+    Args:
+        source (tuple): Description of the sorted values returned by share_array
+        output_name (str): Name of the shared memory block holding the output matrix
+        shape (tuple): Shape of the full grid
+        x_range (tuple): Range for x values as (min, max)
+        y_range (tuple): Range for y values as (min, max)
+        step (int): Step size of the grid
+        stop_loss (float): Loss value in case of failure
+        start (int): First row of the block
+        stop (int): Row after the last row of the block
+    """
+    sorted_values, input_memory = attach_array(source)
+    output_memory = shared_memory.SharedMemory(name=output_name)
+    try:
+        x_values, y_values = grid_axes(x_range, y_range, step)
+        x_values = x_values[start:stop]
+        # Only columns at or after the block's first row can be above the diagonal
+        y_values = y_values[start:]
+        x_counts = len(sorted_values) - np.searchsorted(sorted_values, x_values, side='right')
+        y_counts = len(sorted_values) - np.searchsorted(sorted_values, y_values, side='right')
+        output = np.ndarray(shape, dtype=np.float64, buffer=output_memory.buf)
+        output[start:stop, :start] = np.nan
+        output[start:stop, start:] = expected_value_grid(x_values, y_values, x_counts, y_counts, stop_loss)
+        del output
+    finally:
+        output_memory.close()
+        if input_memory is not None:
+            input_memory.close()
+
+
+def row_blocks(n_rows, n_cols, n_blocks):
+    """
+    Split the rows of an upper-triangular grid into blocks of similar work.
+
+    Args:
+        n_rows (int): Number of grid rows
+        n_cols (int): Number of grid columns
+        n_blocks (int): Target number of blocks
+
+    Returns:
+        list: (start, stop) row bounds of each non-empty block
+    """
+    if n_rows == 0:
+        return []
+    work = np.cumsum(np.maximum(n_cols - np.arange(n_rows), 0) + 1)
+    targets = work[-1] * np.arange(1, n_blocks) / n_blocks
+    cuts = np.unique(np.concatenate(([0], np.searchsorted(work, targets, side='right'), [n_rows])))
+    return [(int(start), int(stop)) for start, stop in zip(cuts[:-1], cuts[1:]) if stop > start]
+
+
+def share_array(array):
+    """
+    Make an array readable by worker processes without pickling it.
+
+    Memory-mapped arrays are shared by file name; others are copied once
+    into a shared memory block, which the caller must close and unlink.
+
+    Args:
+        array (np.ndarray): Array to share
+
+    Returns:
+        tuple: Description of the array for attach_array
+        SharedMemory: The shared memory block, or None for memory-mapped arrays
+    """
+    if isinstance(array, np.memmap) and array.filename:
+        return ('file', array.filename, array.offset, len(array), array.dtype.str), None
+    memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[:] = array
+    return ('shm', memory.name, 0, len(array), array.dtype.str), memory
+
+
+def attach_array(source):
+    """
+    Open an array described by share_array in a worker process.
+
+    Args:
+        source (tuple): Description returned by share_array
+
+    Returns:
+        np.ndarray: Read-only view of the array
+        SharedMemory: The attached shared memory block to close after use, or None
+    """
+    kind, name, offset, length, dtype = source
+    if kind == 'file':
+        if not length:
+            return np.empty(0, dtype=dtype), None
+        return np.memmap(name, dtype=dtype, mode='r', offset=offset, shape=(length,)), None
+    memory = shared_memory.SharedMemory(name=name)
+    return np.ndarray((length,), dtype=dtype, buffer=memory.buf), memory
+
+
+def get_pool(workers):
+    """
+    Return the process-wide worker pool of a size, creating it on first use.
+
+    Args:
+        workers (int): Number of worker processes
+
+    Returns:
+        ProcessPoolExecutor: The shared pool
+    """
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=pool_context())
+        return pool
+
+
+def discard_pool(pool):
+    """
+    Shut down a broken pool so that the next get_pool call creates a new one.
+
+    Args:
+        pool (ProcessPoolExecutor): Pool returned by get_pool
+    """
+    with _pool_lock:
+        # Another sweep may have replaced it already
+        for workers, shared in list(_pools.items()):
+            if shared is pool:
+                del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def pool_context():
+    """
+    Return the multiprocessing context used for worker pools.
+
+    forkserver avoids forking the multi-threaded Streamlit server; spawn is
+    the fallback where it is unavailable.
+
+    Returns:
+        multiprocessing.context.BaseContext: The start-method context
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
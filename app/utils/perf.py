@@ -0,0 +1,251 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+LOG_PATH_ENV = 'DASHBOARD_PERF_LOG'
+MAX_RECORDS = 5000
+
+# Recorder of the rerun running in this thread, None when instrumentation is off
+_current = contextvars.ContextVar('perf_recorder', default=None)
+# Nesting depth of the open spans, per thread, so background work does not shift a rerun's
+_depth = contextvars.ContextVar('perf_depth', default=0)
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def current_rss():
+    """
+    Return the resident memory of the process.
+
+    Reads /proc/self/statm where available, which costs a few microseconds;
+    elsewhere the peak resident size is used instead.
+
+    Returns:
+        int: Resident memory in bytes, 0 if it cannot be measured
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        scale = 1 if os.uname().sysname == 'Darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    except (ImportError, AttributeError, OSError):
+        return 0
+
+
+class _NullSpan:
+    """
+    Span returned when instrumentation is off; entering it does nothing.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """
+    Timed section of a rerun, recorded on its recorder when it exits.
+    """
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.depth = _depth.get()
+        self.depth_token = _depth.set(self.depth + 1)
+        self.rss = current_rss()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration = time.perf_counter() - self.start
+        _depth.reset(self.depth_token)
+        self.recorder.add(self.name, duration, current_rss() - self.rss, self.depth, exc_type is not None)
+        return False
+
+
+def span(name):
+    """
+    Time a section of code in the current rerun.
+
+    When no recorder is active in this thread (instrumentation off, or a
+    thread not started with background_context), this is a single
+    context-variable lookup and the section runs untimed.
+
+    Args:
+        name (str): Name of the section
+
+    Returns:
+        Context manager timing the section
+    """
+    recorder = _current.get()
+    if recorder is None:
+        return _NULL_SPAN
+    return _Span(recorder, name)
+
+
+class PerfRecorder:
+    """
+    Timing and memory records of one session's reruns.
+
+    Records are kept for the last MAX_RECORDS spans, with aggregates per
+    span name over the whole session. When a log path is set (by default
+    from the DASHBOARD_PERF_LOG environment variable), every finished rerun
+    is appended to it as JSON lines.
+    """
+
+    def __init__(self, session_id=None, log_path=None, max_records=MAX_RECORDS):
+        """
+        Initialize an empty recorder.
+
+        Args:
+            session_id (str, optional): Identifier written with every record. Defaults to a random one.
+            log_path (str, optional): JSON lines file receiving the records. Defaults to
+                $DASHBOARD_PERF_LOG, or no file.
+            max_records (int, optional): Records kept in memory. Defaults to MAX_RECORDS.
+        """
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self.log_path = log_path if log_path is not None else os.environ.get(LOG_PATH_ENV)
+        self.records = deque(maxlen=max_records)
+        self.totals = {}
+        self.reruns = 0
+        self.last_rerun = []
+        self._rerun_records = []
+        # Background jobs add spans while a rerun may be finishing
+        self._lock = threading.Lock()
+
+    def rerun(self):
+        """
+        Return a context manager recording the spans of one rerun.
+
+        Returns:
+            Context manager activating this recorder for the current thread
+        """
+        return _Rerun(self)
+
+    def add(self, name, duration, rss_delta, depth=0, failed=False):
+        """
+        Record a finished span.
+
+        Args:
+            name (str): Name of the span
+            duration (float): Duration in seconds
+            rss_delta (int): Change of resident memory in bytes
+            depth (int, optional): Nesting depth in the rerun. Defaults to 0.
+            failed (bool, optional): Whether the span ended with an exception. Defaults to False.
+        """
+        record = {
+            'session': self.session_id,
+            'rerun': self.reruns,
+            'name': name,
+            'depth': depth,
+            'time': time.time(),
+            'duration_s': duration,
+            'rss_delta_bytes': rss_delta,
+            'failed': failed
+        }
+        with self._lock:
+            self.records.append(record)
+            self._rerun_records.append(record)
+            total = self.totals.setdefault(name, {'count': 0, 'total_s': 0.0, 'max_s': 0.0})
+            total['count'] += 1
+            total['total_s'] += duration
+            total['max_s'] = max(total['max_s'], duration)
+
+    def summary(self):
+        """
+        Aggregate the session's spans per name.
+
+        Returns:
+            list: One dict per span name with count, total, mean and max seconds, slowest total first
+        """
+        with self._lock:
+            totals = [(name, dict(total)) for name, total in self.totals.items()]
+        return sorted(
+            (
+                {'name': name, **total, 'mean_s': total['total_s'] / total['count']}
+                for name, total in totals
+            ),
+            key=lambda row: -row['total_s']
+        )
+
+    def to_jsonl(self):
+        """
+        Serialize the records kept in memory.
+
+        Returns:
+            str: One JSON object per line
+        """
+        with self._lock:
+            records = list(self.records)
+        return ''.join(json.dumps(record) + '\n' for record in records)
+
+    def _finish_rerun(self):
+        with self._lock:
+            rerun_records, self._rerun_records = self._rerun_records, []
+        # Spans are recorded as they exit, so nested ones come before their parent
+        self.last_rerun = sorted(rerun_records, key=lambda record: record['time'] - record['duration_s'])
+        if self.log_path:
+            try:
+                with open(self.log_path, 'a') as f:
+                    f.writelines(json.dumps(record) + '\n' for record in self.last_rerun)
+            except OSError:
+                # A broken log destination must not break the dashboard
+                pass
+
+
+def background_context():
+    """
+    Return a copy of the current context for work handed to another thread.
+
+    Spans of code run in it, e.g. with executor.submit(context.run, fn), are
+    recorded on the recorder of the current rerun, at the top level, in
+    whichever rerun of the session is open when they end.
+
+    Returns:
+        contextvars.Context: The context to run the work in
+    """
+    context = contextvars.copy_context()
+    context.run(_depth.set, 0)
+    return context
+
+
+class _Rerun:
+    """
+    Context manager activating a recorder for the spans of one rerun.
+    """
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    def __enter__(self):
+        self.recorder.reruns += 1
+        self.token = _current.set(self.recorder)
+        self.depth_token = _depth.set(0)
+        self.span = _Span(self.recorder, 'rerun').__enter__()
+        return self.recorder
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.span.__exit__(exc_type, exc, traceback)
+        _depth.reset(self.depth_token)
+        _current.reset(self.token)
+        self.recorder._finish_rerun()
+        return False
@@ -0,0 +1,172 @@
+import os
+import threading
+from collections import OrderedDict
+from utils.dataset import Dataset
+from utils.dataset_cache import file_fingerprint
+
+MAX_REGISTRY_BYTES = 2 * 1024 ** 3
+
+# (absolute path, memory_map) -> (fingerprint, Dataset), least recently used first
+_datasets = OrderedDict()
+_lock = threading.Lock()
+# (absolute path, memory_map) -> lock held while the file loads; dropped with its dataset
+_loading_locks = {}
+
+
+def get_dataset(file_path, use_cache=True, memory_map=False, max_bytes=MAX_REGISTRY_BYTES, incremental=False):
+    """
+    Return the process-wide shared Dataset of a CSV file, loading it if needed.
+
+    Every Streamlit session asking for the same unchanged file gets the same
+    instance. A dataset whose file changed on disk is replaced, and the least
+    recently used datasets are dropped once the registry holds more than
+    max_bytes of in-memory data, cached results included. In incremental mode, a file that was only
+    appended to is not reloaded: its new rows are merged into the previous
+    dataset (see Dataset.load_appended).
+
+    Args:
+        file_path (str): Path to the CSV file
+        use_cache (bool, optional): Whether to reuse the parsed arrays cached on disk. Defaults to True.
+        memory_map (bool, optional): Whether to memory-map the cached arrays. Defaults to False.
+        max_bytes (int, optional): In-memory size limit of the registry. Defaults to MAX_REGISTRY_BYTES.
+        incremental (bool, optional): Whether to only read the rows appended to a changed file.
+            Defaults to False.
+
+    Returns:
+        Dataset: The shared dataset
+    """
+    key = (os.path.abspath(file_path), memory_map)
+    fingerprint = file_fingerprint(file_path)
+
+    with _lock:
+        dataset = lookup(key, fingerprint)
+        if dataset is not None:
+            # Cached results grow the datasets after they are loaded
+            enforce_limit(max_bytes, keep=key)
+            return dataset
+        loading_lock = _loading_locks.setdefault(key, threading.Lock())
+
+    # Load outside the registry lock so other files stay available meanwhile,
+    # but only once per file when several sessions ask at the same time
+    with loading_lock:
+        with _lock:
+            dataset = lookup(key, fingerprint)
+            previous = _datasets.get(key, (None, None))[1]
+        if dataset is None:
+            try:
+                if incremental and previous is not None:
+                    dataset = previous.load_appended()
+                if dataset is None:
+                    dataset = Dataset.load(file_path, use_cache=use_cache, memory_map=memory_map)
+            except Exception:
+                with _lock:
+                    if key not in _datasets:
+                        _loading_locks.pop(key, None)
+                raise
+            with _lock:
+                _datasets[key] = (fingerprint, dataset)
+                enforce_limit(max_bytes, keep=key)
+    return dataset
+
+
+def peek(file_path, memory_map=False):
+    """
+    Return the registered dataset of a file without checking it is up to date.
+
+    Args:
+        file_path (str): Path to the CSV file
+        memory_map (bool, optional): Mode the dataset was loaded in. Defaults to False.
+
+    Returns:
+        Dataset: The registered dataset, or None if the file was never loaded
+    """
+    with _lock:
+        entry = _datasets.get((os.path.abspath(file_path), memory_map))
+        return entry[1] if entry else None
+
+
+def lookup(key, fingerprint):
+    """
+    Return the registered dataset for key if it matches fingerprint.
+
+    Must be called with the registry lock held. A stale entry for a changed
+    file is kept until it is replaced, so that its rows can be reused.
+
+    Args:
+        key (tuple): (absolute path, memory_map)
+        fingerprint (tuple): Current (path, size, mtime) of the file
+
+    Returns:
+        Dataset: The registered dataset, or None
+    """
+    entry = _datasets.get(key)
+    if entry is None:
+        return None
+    if entry[0] != fingerprint:
+        return None
+    _datasets.move_to_end(key)
+    return entry[1]
+
+
+def enforce_limit(max_bytes=MAX_REGISTRY_BYTES, keep=None):
+    """
+    Drop least recently used datasets until the registry fits in max_bytes.
+
+    Must be called with the registry lock held. Sessions still holding a
+    dropped dataset keep using it; it is only no longer shared.
+
+    Args:
+        max_bytes (int, optional): In-memory size limit of the registry. Defaults to MAX_REGISTRY_BYTES.
+        keep (tuple, optional): Key that must not be dropped. Defaults to None.
+    """
+    total = sum(dataset.nbytes for _, dataset in _datasets.values())
+    for key in list(_datasets):
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        total -= _datasets.pop(key)[1].nbytes
+        forget_loading_lock(key)
+
+
+def forget_loading_lock(key):
+    """
+    Drop the loading lock of a file whose dataset left the registry.
+
+    Must be called with the registry lock held. A lock held by a load in
+    progress is kept; that load registers the dataset again.
+
+    Args:
+        key (tuple): (absolute path, memory_map)
+    """
+    loading_lock = _loading_locks.get(key)
+    if loading_lock is not None and not loading_lock.locked():
+        del _loading_locks[key]
+
+
+def evict(file_path=None):
+    """
+    Remove datasets from the registry.
+
+    Args:
+        file_path (str, optional): Only remove the datasets of this file. Defaults to None (all).
+    """
+    with _lock:
+        path = os.path.abspath(file_path) if file_path is not None else None
+        for key in [key for key in _datasets if path is None or key[0] == path]:
+            del _datasets[key]
+            forget_loading_lock(key)
+
+
+def registry_stats():
+    """
+    Describe the datasets currently shared by the process.
+
+    Returns:
+        list: One dict per dataset with its path, mode, row count and in-memory size
+    """
+    with _lock:
+        return [
+            {'file_path': path, 'memory_map': memory_map, 'rows': len(dataset), 'bytes': dataset.nbytes}
+            for (path, memory_map), (_, dataset) in _datasets.items()
+        ]
@@ -0,0 +1,149 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def result_nbytes(value):
+    """
+    Estimate the memory held by a cached result.
+
+    Arrays count their buffer, containers the sum of their items and other
+    objects their own size.
+
+    Args:
+        value: Cached result
+
+    Returns:
+        int: Estimated size in bytes
+    """
+    if hasattr(value, 'nbytes'):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(result_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(result_nbytes(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with an optional time to live.
+
+    Hit and miss counters are kept so cache effectiveness can be inspected.
+    The size of the cached values is tracked too, and the cache can be
+    limited by it as well as by its number of entries.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, max_bytes=None, sizeof=result_nbytes):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int, optional): Maximum number of entries. Defaults to 1024.
+            ttl (float, optional): Seconds after which an entry expires. Defaults to None (never).
+            max_bytes (int, optional): Maximum total size of the values; the most recent entry
+                is kept even if it is larger. Defaults to None (no limit).
+            sizeof (callable, optional): Returns the size of a value in bytes. Defaults to result_nbytes.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        """
+        int: Estimated total size of the cached values.
+        """
+        return self._bytes
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for key, or default on a miss.
+
+        Args:
+            key (hashable): Cache key
+            default (optional): Value returned on a miss. Defaults to None.
+
+        Returns:
+            The cached value or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self._bytes -= entry[2]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used entries when full.
+
+        Args:
+            key (hashable): Cache key
+            value: Value to store
+        """
+        size = self.sizeof(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (time.monotonic(), value, size)
+            self._bytes += size
+            while len(self._entries) > self.maxsize or (
+                self.max_bytes is not None and self._bytes > self.max_bytes and len(self._entries) > 1
+            ):
+                self._bytes -= self._entries.popitem(last=False)[1][2]
+
+    def keys(self):
+        """
+        Return the cached keys, least recently used first.
+
+        Returns:
+            list: Keys of the entries
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        """
+        Remove every entry and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: hits, misses, hit_rate, size, maxsize and bytes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'bytes': self._bytes
+            }
+
+    def __len__(self):
+        return len(self._entries)
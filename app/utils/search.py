@@ -0,0 +1,197 @@
+import numpy as np
+from utils.grid import expected_values, grid_size
+
+TOP_K = 8
+REFINE_FACTOR = 4
+COARSE_POINTS = 64
+WINDOW = 2
+
+
+def adaptive_search(sorted_values, x_range, y_range, step, stop_loss, top_k=TOP_K,
+                    refine_factor=REFINE_FACTOR, coarse_points=COARSE_POINTS, window=WINDOW, progress=None):
+    """
+    Find the best (x, y) pair of the search grid with a coarse-to-fine search.
+
+    The grid is the one of InvestmentAnalyzer.find_optimal_parameters: x goes
+    from x_range[0] to x_range[1] and y from x + step to y_range[1], on the
+    thresholds x_range[0] + k * step. A coarse sub-grid with at most about
+    coarse_points thresholds per axis is evaluated first. Then, level by
+    level, the top_k best separate regions (window current steps around a
+    good pair) are refined with a step refine_factor times smaller, until
+    the step of the grid is reached.
+    Every evaluated pair lies on the grid and its value is computed exactly
+    like find_value, so a pair found by both searches has the same value.
+    Ties are broken like the exhaustive search (smallest x, then smallest y).
+
+    Args:
+        sorted_values (np.ndarray): Values sorted ascending (scam filtering already applied)
+        x_range (tuple): Range for x values as (min, max)
+        y_range (tuple): Range for y values as (min, max)
+        step (int): Step size of the grid
+        stop_loss (float): Loss value in case of failure
+        top_k (int, optional): Regions refined at each level. Defaults to TOP_K.
+        refine_factor (int, optional): Step reduction between levels. Defaults to REFINE_FACTOR.
+        coarse_points (int, optional): Thresholds per axis of the coarse grid. Defaults to COARSE_POINTS.
+        window (int, optional): Half-width of a refined region, in steps of the level. Defaults to WINDOW.
+        progress (callable, optional): Called as progress(done, total, best) after each level,
+            with the best (x, y, value) found so far. It may raise to stop the search.
+            Defaults to None.
+
+    Returns:
+        dict: 'optimum' as (x, y, value, x_count, y_count), or (0, 0, 0) when no
+            pair has a positive value; 'evaluations' and 'exhaustive_evaluations',
+            the pairs evaluated by this search and by the exhaustive one; 'levels';
+            'x', 'y' and 'values' of every evaluated pair
+    """
+    x_min = x_range[0]
+    # Grid thresholds in units of step from x_min: rows 0..last_row, columns 1..last_col
+    last_row = (x_range[1] - x_min) // step
+    last_col = (y_range[1] - x_min) // step
+
+    stride = 1
+    total_levels = 1
+    while max(last_row, last_col) > coarse_points * stride:
+        stride *= refine_factor
+        total_levels += 1
+
+    rows, cols = np.meshgrid(
+        np.arange(0, last_row + 1, stride, dtype=np.int64),
+        np.arange(stride, last_col + 1, stride, dtype=np.int64),
+        indexing='ij'
+    )
+    rows, cols = valid_pairs(rows.ravel(), cols.ravel(), last_row, last_col)
+    values = evaluate_pairs(sorted_values, x_min, step, rows, cols, stop_loss)
+    levels = 1
+    report_progress(progress, levels, total_levels, x_min, step, rows, cols, values)
+
+    while stride > 1 and len(values):
+        centers = select_regions(rows, cols, values, top_k, window * stride)
+        fine_stride = stride // refine_factor
+        offsets = np.arange(-window * stride, window * stride + 1, fine_stride, dtype=np.int64)
+        d_rows, d_cols = np.meshgrid(offsets, offsets, indexing='ij')
+        new_rows = (rows[centers, np.newaxis] + d_rows.ravel()).ravel()
+        new_cols = (cols[centers, np.newaxis] + d_cols.ravel()).ravel()
+        new_rows, new_cols = valid_pairs(new_rows, new_cols, last_row, last_col)
+
+        # Overlapping windows and points of earlier levels are evaluated only once
+        keys = new_rows * (last_col + 1) + new_cols
+        keys, first = np.unique(keys, return_index=True)
+        unseen = ~np.isin(keys, rows * (last_col + 1) + cols)
+        new_rows, new_cols = new_rows[first[unseen]], new_cols[first[unseen]]
+
+        rows = np.concatenate((rows, new_rows))
+        cols = np.concatenate((cols, new_cols))
+        values = np.concatenate((values, evaluate_pairs(sorted_values, x_min, step, new_rows, new_cols, stop_loss)))
+        stride = fine_stride
+        levels += 1
+        report_progress(progress, levels, total_levels, x_min, step, rows, cols, values)
+
+    optimum = (0, 0, 0)
+    if len(values):
+        best = np.lexsort((cols, rows, -values))[0]
+        if values[best] > 0:
+            x = x_min + int(rows[best]) * step
+            y = x_min + int(cols[best]) * step
+            x_count, y_count = len(sorted_values) - np.searchsorted(sorted_values, [x, y], side='right')
+            optimum = (x, y, float(values[best]), int(x_count), int(y_count))
+
+    return {
+        'optimum': optimum,
+        'evaluations': len(values),
+        'exhaustive_evaluations': grid_size(x_range, y_range, step),
+        'levels': levels,
+        'x': x_min + rows * step,
+        'y': x_min + cols * step,
+        'values': values
+    }
+
+
+def report_progress(progress, done, total, x_min, step, rows, cols, values):
+    """
+    Call a progress callback with the best pair evaluated so far.
+
+    Args:
+        progress (callable): Callback taking (done, total, best), or None
+        done (int): Levels evaluated
+        total (int): Levels of the whole search
+        x_min (int): First threshold of the grid
+        step (int): Step size of the grid
+        rows (np.ndarray): Row index of each evaluated pair
+        cols (np.ndarray): Column index of each evaluated pair
+        values (np.ndarray): Expected value of each evaluated pair
+    """
+    if progress is None:
+        return
+    best = None
+    if len(values):
+        i = int(np.argmax(values))
+        best = (x_min + int(rows[i]) * step, x_min + int(cols[i]) * step, float(values[i]))
+    progress(done, total, best)
+
+
+def valid_pairs(rows, cols, last_row, last_col):
+    """
+    Keep the grid positions that are inside the grid and above its diagonal.
+
+    Args:
+        rows (np.ndarray): Row positions, in steps from x_min
+        cols (np.ndarray): Column positions, in steps from x_min
+        last_row (int): Last row of the grid
+        last_col (int): Last column of the grid
+
+    Returns:
+        np.ndarray: Valid row positions
+        np.ndarray: Valid column positions
+    """
+    valid = (rows >= 0) & (rows <= last_row) & (cols > rows) & (cols <= last_col)
+    return rows[valid], cols[valid]
+
+
+def evaluate_pairs(sorted_values, x_min, step, rows, cols, stop_loss):
+    """
+    Compute the expected value of scattered grid positions.
+
+    Args:
+        sorted_values (np.ndarray): Values sorted ascending
+        x_min (int): First threshold of the grid
+        step (int): Step size of the grid
+        rows (np.ndarray): Row positions, in steps from x_min
+        cols (np.ndarray): Column positions, in steps from x_min
+        stop_loss (float): Loss value in case of failure
+
+    Returns:
+        np.ndarray: Expected value of each position
+    """
+    x_values = x_min + rows * step
+    y_values = x_min + cols * step
+    x_counts = len(sorted_values) - np.searchsorted(sorted_values, x_values, side='right')
+    y_counts = len(sorted_values) - np.searchsorted(sorted_values, y_values, side='right')
+    return expected_values(x_values, y_values, x_counts, y_counts, stop_loss)
+
+
+def select_regions(rows, cols, values, top_k, radius):
+    """
+    Pick the best evaluated positions that are more than radius apart.
+
+    Neighbours of a good position are usually good too; skipping them lets
+    the top_k regions cover separate peaks of the surface instead of one.
+
+    Args:
+        rows (np.ndarray): Row positions of the evaluated pairs
+        cols (np.ndarray): Column positions of the evaluated pairs
+        values (np.ndarray): Expected values of the evaluated pairs
+        top_k (int): Maximum number of regions
+        radius (int): Positions within this distance (on both axes) of a picked one are skipped
+
+    Returns:
+        list: Indexes of the picked positions, best first
+    """
+    order = np.lexsort((cols, rows, -values))
+    available = np.ones(len(order), dtype=bool)
+    picked = []
+    while len(picked) < top_k and available.any():
+        center = order[np.argmax(available)]
+        picked.append(center)
+        near = (np.abs(rows[order] - rows[center]) <= radius) & (np.abs(cols[order] - cols[center]) <= radius)
+        available &= ~near
+    return picked
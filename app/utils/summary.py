@@ -0,0 +1,89 @@
+import numpy as np
+
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+class SummaryStatistics:
+    """
+    Summary statistics of a dataset, computed once and read by the dashboard.
+
+    Everything except the mean and the scam count is read from the sorted
+    values: min and max are their ends and quantiles are interpolated
+    between two entries. Building the summary is therefore one pass over
+    the data for the mean and scam count. Histograms are computed on demand
+    by Dataset.histogram.
+    """
+
+    def __init__(self, count, mean, min_value, max_value, scam_count, quantiles):
+        """
+        Initialize the summary from precomputed values.
+
+        Args:
+            count (int): Number of values
+            mean (float): Mean value, NaN for an empty dataset
+            min_value (int): Smallest value, None for an empty dataset
+            max_value (int): Largest value, None for an empty dataset
+            scam_count (int): Number of scam entries
+            quantiles (dict): Value at each quantile in QUANTILES
+        """
+        self.count = count
+        self.mean = mean
+        self.min = min_value
+        self.max = max_value
+        self.scam_count = scam_count
+        self.quantiles = quantiles
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """
+        Compute the summary of a dataset.
+
+        Args:
+            dataset (Dataset): The dataset to summarize
+
+        Returns:
+            SummaryStatistics: The summary
+        """
+        sorted_values = dataset.sorted_values
+        count = len(sorted_values)
+        if not count:
+            return cls(0, float('nan'), None, None, 0, {})
+
+        quantile_values = sorted_quantiles(sorted_values, QUANTILES)
+        return cls(
+            count=count,
+            mean=float(np.mean(dataset.values)),
+            min_value=int(sorted_values[0]),
+            max_value=int(sorted_values[-1]),
+            scam_count=int(np.count_nonzero(dataset.scams)),
+            quantiles=dict(zip(QUANTILES, quantile_values.tolist()))
+        )
+
+    @property
+    def scam_share(self):
+        """
+        float: Fraction of scam entries, 0 for an empty dataset.
+        """
+        return self.scam_count / self.count if self.count else 0.0
+
+
+def sorted_quantiles(sorted_values, quantiles):
+    """
+    Compute quantiles of already sorted values without sorting or partitioning.
+
+    Uses the same linear interpolation as np.quantile.
+
+    Args:
+        sorted_values (np.ndarray): Non-empty values sorted ascending
+        quantiles (tuple): Quantiles between 0 and 1
+
+    Returns:
+        np.ndarray: Value at each quantile
+    """
+    positions = np.asarray(quantiles, dtype=np.float64) * (len(sorted_values) - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    low_values = sorted_values[lower].astype(np.float64)
+    high_values = sorted_values[upper].astype(np.float64)
+    return low_values + (high_values - low_values) * (positions - lower)
+
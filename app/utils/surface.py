@@ -0,0 +1,122 @@
+import numpy as np
+
+
+class Surface:
+    """
+    Expected-value surface of the optimization grid.
+
+    Wraps the arrays of InvestmentAnalyzer.evaluate_grid: rows are the x
+    thresholds, columns the y thresholds, and pairs with y <= x are NaN.
+    Every view of the surface (optimum, plots, statistics) is derived from
+    these arrays, so a grid is computed once however many views use it.
+    """
+
+    def __init__(self, x_values, y_values, values, x_counts, y_counts):
+        """
+        Initialize the surface from grid arrays.
+
+        Args:
+            x_values (np.ndarray): x values of the grid rows
+            y_values (np.ndarray): y values of the grid columns
+            values (np.ndarray): Expected values, shape (len(x), len(y)), NaN where y <= x
+            x_counts (np.ndarray): Count of values above each x
+            y_counts (np.ndarray): Count of values above each y
+        """
+        self.x_values = x_values
+        self.y_values = y_values
+        self.values = values
+        self.x_counts = x_counts
+        self.y_counts = y_counts
+
+    @property
+    def valid(self):
+        """
+        np.ndarray: bool mask of the grid pairs with y > x.
+        """
+        return ~np.isnan(self.values)
+
+    @property
+    def valid_points(self):
+        """
+        int: Number of grid pairs with y > x.
+        """
+        return int(np.count_nonzero(self.valid))
+
+    def max_pool(self, max_rows, max_cols):
+        """
+        Downsample the surface for display, keeping the highest value of each block.
+
+        Consecutive rows and columns are grouped into blocks so that at most
+        max_rows x max_cols blocks remain. Taking the maximum (ignoring NaN)
+        keeps peaks visible: the block holding the optimum shows its value.
+        Each block is labelled with the thresholds of its first row and column.
+
+        Args:
+            max_rows (int): Maximum number of x values after downsampling
+            max_cols (int): Maximum number of y values after downsampling
+
+        Returns:
+            np.ndarray: x value of each block row
+            np.ndarray: y value of each block column
+            np.ndarray: Block maxima, NaN for blocks without valid pairs
+        """
+        n_rows, n_cols = self.values.shape
+        row_block = max(-(-n_rows // max(max_rows, 1)), 1)
+        col_block = max(-(-n_cols // max(max_cols, 1)), 1)
+        if self.values.size == 0 or (row_block == 1 and col_block == 1):
+            return self.x_values, self.y_values, self.values
+
+        row_starts = np.arange(0, n_rows, row_block)
+        col_starts = np.arange(0, n_cols, col_block)
+        # fmax ignores NaN, so only blocks entirely below the diagonal stay NaN
+        pooled = np.fmax.reduceat(self.values, row_starts, axis=0)
+        pooled = np.fmax.reduceat(pooled, col_starts, axis=1)
+        return self.x_values[row_starts], self.y_values[col_starts], pooled
+
+    def points(self):
+        """
+        Return the coordinates and values of the valid grid pairs.
+
+        Returns:
+            np.ndarray: x of each pair
+            np.ndarray: y of each pair
+            np.ndarray: Expected value of each pair
+        """
+        rows, cols = np.nonzero(self.valid)
+        return self.x_values[rows], self.y_values[cols], self.values[rows, cols]
+
+    def stats(self):
+        """
+        Summarize the expected values of the valid grid pairs.
+
+        Returns:
+            dict: min, max, mean and valid_points (NaN statistics when the grid is empty)
+        """
+        valid = self.values[self.valid]
+        if not len(valid):
+            return {'min': np.nan, 'max': np.nan, 'mean': np.nan, 'valid_points': 0}
+        return {
+            'min': float(valid.min()),
+            'max': float(valid.max()),
+            'mean': float(valid.mean()),
+            'valid_points': len(valid)
+        }
+
+    def optimum(self):
+        """
+        Return the grid pair with the highest expected value.
+
+        Returns:
+            tuple: (x, y, value, x_count, y_count), or (0, 0, 0) when no pair
+                has a positive value
+        """
+        max_value = [0, 0, 0]  # [x, y, value]
+        if self.valid.any():
+            # nanargmax returns the first maximum in row-major order, like the original x/y loop
+            i, j = np.unravel_index(np.nanargmax(self.values), self.values.shape)
+            if self.values[i, j] > max_value[2]:
+                max_value = [
+                    int(self.x_values[i]), int(self.y_values[j]), float(self.values[i, j]),
+                    int(self.x_counts[i]), int(self.y_counts[j])
+                ]
+        return tuple(max_value)
@@ -1,6 +1,21 @@
-import csv
+"""
+Investment analysis of a CSV dataset, shared by the dashboard and the batch runner.
+
+Run the example below from the app directory, as the modules are imported
+as utils.*:
+    python -m utils.tim [CSV]   (defaults to data/test.csv)
+"""
+import sys
 import numpy as np
-import matplotlib.pyplot as plt
+from utils.loader import read_csv_columns
+from utils.dataset import Dataset
+from utils.grid import grid_axes, expected_value_grid, best_in_rows
+from utils.parallel import evaluate_grid_parallel, row_blocks
+from utils.search import adaptive_search, TOP_K
+from utils.surface import Surface
+from utils.perf import span
+
+PROGRESS_BLOCKS = 64
 
 class InvestmentAnalyzer:
     """
@@ -10,42 +25,125 @@ class InvestmentAnalyzer:
     expected values and find optimal investment parameters.
     """
     
-    def __init__(self, file_path, stop_loss=0.3, with_scam=False):
+    def __init__(self, file_path, stop_loss=0.3, with_scam=False, use_cache=True, memory_map=False, dataset=None):
         """
         Initialize the InvestmentAnalyzer with data from a CSV file.
         
         Args:
             file_path (str): Path to the CSV file containing investment data
             stop_loss (float, optional): Default stop loss value. Defaults to 0.3.
+            with_scam (bool, optional): Whether scam entries are included. Defaults to False.
+            use_cache (bool, optional): Whether to reuse the parsed arrays cached on disk. Defaults to True.
+            memory_map (bool, optional): Whether to memory-map the cached arrays instead of
+                reading them into RAM, for files larger than memory. Implies use_cache. Defaults to False.
+            dataset (Dataset, optional): Already loaded data of file_path, e.g. from the shared
+                registry. When given, nothing is read from disk. Defaults to None.
         """
         self.file_path = file_path
         self.stop_loss = stop_loss
-        self.data = self.load_csv_data(file_path)
         self.with_scam = with_scam
+        if dataset is None:
+            dataset = Dataset.load(file_path, use_cache=use_cache, memory_map=memory_map)
+        self.dataset = dataset
+    
+    @property
+    def values(self):
+        """
+        np.ndarray: int64 values of every valid row.
+        """
+        return self.dataset.values
+    
+    @property
+    def scams(self):
+        """
+        np.ndarray: bool scam flag of every valid row.
+        """
+        return self.dataset.scams
+    
+    @property
+    def dropped_rows(self):
+        """
+        int: Number of invalid rows skipped while loading the file.
+        """
+        return self.dataset.dropped_rows
+    
+    @property
+    def summary(self):
+        """
+        SummaryStatistics: Statistics of the data, shared through the dataset.
+        """
+        return self.dataset.summary
+    
+    @property
+    def data(self):
+        """
+        list: (value, scam) tuples for each row, built on demand from the column arrays.
+        """
+        return list(zip(self.values.tolist(), self.scams.tolist()))
     
     def load_csv_data(self, file_path):
         """
-        Load data from a CSV file, extracting the third element from each row.
+        Load data from a CSV file, extracting the value (third) and scam (18th) columns.
         
         Args:
             file_path (str): Path to the CSV file to load
             
         Returns:
-            list: List of integer values extracted from the third column
-        """
-        data = []
-        with open(file_path, 'r', encoding='latin-1') as csv_file:
-            csv_reader = csv.reader(csv_file, delimiter=';')
-            for row in csv_reader:
-                # Get the third element (index 2) from each row
-                try:
-                    value = int(row[2])  # Convert the third element to integer
-                    scam = str(row[17]) == "True"  # Convert the fourth element to boolean
-                    data.append((value, scam))
-                except (ValueError, IndexError):
-                    # Skip headers or invalid rows
-                    continue
-        return data
+            np.ndarray: int64 values extracted from the third column
+            np.ndarray: bool scam flags extracted from the 18th column
+            int: Number of invalid rows that were skipped
+        """
+        return read_csv_columns(file_path)
+    
+    def count_above(self, threshold, with_scam=None):
+        """
+        Count the values strictly greater than a threshold.
+        
+        Args:
+            threshold (int): Threshold value
+            with_scam (bool, optional): Whether scam entries are counted. Defaults to self.with_scam.
+            
+        Returns:
+            int: Count of values above the threshold
+        """
+        if with_scam is None:
+            with_scam = self.with_scam
+        return self.dataset.count_above(threshold, with_scam)
+    
+    def survival_counts(self, thresholds, with_scam=None):
+        """
+        Count the values strictly greater than each of several thresholds.
+        
+        Args:
+            thresholds (array-like): Threshold values
+            with_scam (bool, optional): Whether scam entries are counted. Defaults to self.with_scam.
+            
+        Returns:
+            np.ndarray: Count of values above each threshold
+        """
+        if with_scam is None:
+            with_scam = self.with_scam
+        return self.dataset.survival_counts(thresholds, with_scam)
+    
+    def survival_index(self, start, stop, step, with_scam=None):
+        """
+        Return the complementary CDF of the data evaluated on a threshold grid.
+        
+        The index is built once per (step, range, with_scam) and shared through
+        the dataset by every analyzer on the same file.
+        
+        Args:
+            start (int): First threshold of the grid
+            stop (int): Last allowed threshold of the grid (inclusive)
+            step (int): Spacing between thresholds
+            with_scam (bool, optional): Whether scam entries are counted. Defaults to self.with_scam.
+            
+        Returns:
+            np.ndarray: Count of values above each grid threshold
+        """
+        if with_scam is None:
+            with_scam = self.with_scam
+        return self.dataset.survival_index(start, stop, step, with_scam)
     
     def expected_value(self, stop_loss=0.0, multiplier=1.0, rate=0.5):
         """
@@ -74,26 +172,17 @@ class InvestmentAnalyzer:
             int: Count of values above x
             int: Count of values above y
         """
-        x_count = 0
-        y_count = 0
-        if self.with_scam:
-            for row, scam in self.data:
-                if row > x:  # Only consider non-scam entries
-                    x_count += 1
-                if row > y:  # Only consider non-scam entries
-                    y_count += 1
-        else:
-            for row, scam in self.data:
-                if row > x and not scam:  # Only consider non-scam entries
-                    x_count += 1
-                if row > y and not scam:  # Only consider non-scam entries
-                    y_count += 1
+        x_count = self.count_above(x)
+        y_count = self.count_above(y)
         return y_count / x_count if x_count > 0 else 0, x_count, y_count
     
     def find_value(self, x, y):
         """
         Calculate the expected value for given thresholds x and y.
         
+        Results are memoized per (x, y, stop_loss, with_scam) in the dataset's
+        shared LRU cache.
+        
         Args:
             x (int): Lower threshold value
             y (int): Upper threshold value
@@ -103,39 +192,196 @@ class InvestmentAnalyzer:
             int: Count of values above x
             int: Count of values above y
         """
-        rate, x_count, y_count = self.find_rate(x, y)
-        return self.expected_value(stop_loss=self.stop_loss, multiplier=y/x, rate=rate), x_count, y_count
+        key = (x, y, self.stop_loss, self.with_scam)
+        result = self.dataset.value_cache.get(key)
+        if result is None:
+            rate, x_count, y_count = self.find_rate(x, y)
+            result = self.expected_value(stop_loss=self.stop_loss, multiplier=y/x, rate=rate), x_count, y_count
+            self.dataset.value_cache.put(key, result)
+        return result
     
-    def find_optimal_parameters(self, x_range=(20000, 1000000), y_range=(20000, 1000000), step=10000, visualize=False):
+    def evaluate_grid(self, x_range=(20000, 1000000), y_range=(20000, 1000000), step=10000, workers=1, progress=None):
+        """
+        Calculate the expected value for every (x, y) pair of the search grid at once.
+        
+        The grid matches find_optimal_parameters: x goes from x_range[0] to
+        x_range[1] and, for each x, y goes from x + step to y_range[1]. Both
+        axes share the thresholds x_range[0] + k * step, so the valid pairs
+        form the upper triangle of the returned matrix. The result is cached
+        per (ranges, step, stop_loss, with_scam) in the dataset's shared LRU
+        cache and its arrays are read-only.
+        
+        Args:
+            x_range (tuple, optional): Range for x values as (min, max). Defaults to (20000, 1000000).
+            y_range (tuple, optional): Range for y values as (min, max). Defaults to (20000, 1000000).
+            step (int, optional): Step size of the grid. Defaults to 10000.
+            workers (int, optional): Number of processes sharing the sweep; 1 computes in
+                this process, None uses every core. Defaults to 1.
+            progress (callable, optional): Progress callback of compute_grid, not called on a
+                cache hit. Defaults to None.
+            
+        Returns:
+            np.ndarray: x values of the grid rows
+            np.ndarray: y values of the grid columns
+            np.ndarray: Expected values, shape (len(x), len(y)), NaN where y <= x
+            np.ndarray: Count of values above each x
+            np.ndarray: Count of values above each y
+        """
+        key = (tuple(x_range), tuple(y_range), step, self.stop_loss, self.with_scam)
+        grid = self.dataset.grid_cache.get(key)
+        if grid is None:
+            with span("grid_sweep"):
+                grid = self.compute_grid(x_range, y_range, step, workers, progress)
+            for array in grid:
+                array.flags.writeable = False
+            self.dataset.grid_cache.put(key, grid)
+        return grid
+    
+    def surface(self, x_range=(20000, 1000000), y_range=(20000, 1000000), step=10000, workers=1):
+        """
+        Return the expected-value surface of the search grid.
+        
+        This is the single entry point for every view of the grid (optimizer,
+        heatmap, 3D plot): they all share the grid cached by evaluate_grid,
+        and downsampled views for display are taken with Surface.max_pool
+        instead of being recomputed.
+        
+        Args:
+            x_range (tuple, optional): Range for x values as (min, max). Defaults to (20000, 1000000).
+            y_range (tuple, optional): Range for y values as (min, max). Defaults to (20000, 1000000).
+            step (int, optional): Step size of the grid. Defaults to 10000.
+            workers (int, optional): Number of processes sharing the sweep; 1 computes in
+                this process, None uses every core. Defaults to 1.
+            
+        Returns:
+            Surface: The surface, backed by read-only arrays
+        """
+        return Surface(*self.evaluate_grid(x_range, y_range, step, workers))
+    
+    def compute_grid(self, x_range, y_range, step, workers=1, progress=None):
+        """
+        Compute the expected-value grid of evaluate_grid without caching.
+        
+        With a progress callback the grid is computed in blocks of rows, and
+        the callback is called after each block so the caller can report
+        progress or stop the sweep by raising.
+        
+        Args:
+            x_range (tuple): Range for x values as (min, max)
+            y_range (tuple): Range for y values as (min, max)
+            step (int): Step size of the grid
+            workers (int, optional): Number of processes; 1 computes in this process,
+                None uses every core. Defaults to 1.
+            progress (callable, optional): Called as progress(done, total, best) after each block,
+                with the best (x, y, value) found so far. Defaults to None.
+            
+        Returns:
+            tuple: (x values, y values, expected values, x counts, y counts) as in evaluate_grid
+        """
+        if workers != 1:
+            sorted_values = self.dataset.sorted_values if self.with_scam else self.dataset.sorted_clean_values
+            return evaluate_grid_parallel(sorted_values, x_range, y_range, step, self.stop_loss, workers, progress)
+        
+        x_values, y_values = grid_axes(x_range, y_range, step)
+        counts = self.survival_index(x_range[0], max(x_range[1], y_range[1]), step)
+        x_counts = counts[:len(x_values)]
+        y_counts = counts[1:len(y_values) + 1]
+        if progress is None:
+            values = expected_value_grid(x_values, y_values, x_counts, y_counts, self.stop_loss)
+            return x_values, y_values, values, x_counts, y_counts
+        
+        values = np.empty((len(x_values), len(y_values)))
+        blocks = row_blocks(len(x_values), len(y_values), PROGRESS_BLOCKS)
+        best = None
+        for done, (start, stop) in enumerate(blocks, 1):
+            values[start:stop] = expected_value_grid(
+                x_values[start:stop], y_values, x_counts[start:stop], y_counts, self.stop_loss, row_offset=start
+            )
+            best = best_in_rows(x_values, y_values, values, start, stop, best)
+            progress(done, len(blocks), best)
+        return x_values, y_values, values, x_counts, y_counts
+    
+    def adaptive_search(self, x_range=(20000, 1000000), y_range=(20000, 1000000), step=10000, top_k=TOP_K, progress=None):
+        """
+        Search the grid of find_optimal_parameters coarse-to-fine instead of exhaustively.
+        
+        A coarse grid is evaluated first, then the top_k best regions are
+        refined level by level down to step. The result is cached per
+        (ranges, step, top_k, stop_loss, with_scam) in the dataset's shared
+        LRU cache.
+        
+        Args:
+            x_range (tuple, optional): Range for x values as (min, max). Defaults to (20000, 1000000).
+            y_range (tuple, optional): Range for y values as (min, max). Defaults to (20000, 1000000).
+            step (int, optional): Step size of the final grid. Defaults to 10000.
+            top_k (int, optional): Regions refined at each level. Defaults to TOP_K.
+            progress (callable, optional): Called as progress(done, total, best) after each level,
+                not called on a cache hit. Defaults to None.
+            
+        Returns:
+            dict: 'optimum' as returned by find_optimal_parameters, 'evaluations' and
+                'exhaustive_evaluations' counts, 'levels', and the 'x', 'y' and 'values'
+                of every evaluated pair
+        """
+        key = ('adaptive', tuple(x_range), tuple(y_range), step, top_k, self.stop_loss, self.with_scam)
+        result = self.dataset.grid_cache.get(key)
+        if result is None:
+            sorted_values = self.dataset.sorted_values if self.with_scam else self.dataset.sorted_clean_values
+            with span("adaptive_search"):
+                result = adaptive_search(sorted_values, x_range, y_range, step, self.stop_loss, top_k=top_k, progress=progress)
+            for name in ('x', 'y', 'values'):
+                result[name].flags.writeable = False
+            self.dataset.grid_cache.put(key, result)
+        return result
+    
+    def cache_stats(self):
+        """
+        Return the hit/miss counters of the shared result caches.
+        
+        Returns:
+            dict: Counters of the 'values' (find_value) and 'grids' (evaluate_grid) caches
+        """
+        return {
+            'values': self.dataset.value_cache.stats(),
+            'grids': self.dataset.grid_cache.stats()
+        }
+    
+    def find_optimal_parameters(self, x_range=(20000, 1000000), y_range=(20000, 1000000), step=10000, visualize=False, workers=1, method='exhaustive'):
         """
         Find optimal x and y parameters that maximize the expected value.
         
+        The 'exhaustive' method evaluates every pair of the grid. The 'adaptive'
+        method refines the best regions of a coarse grid (see adaptive_search),
+        which evaluates far fewer pairs at fine steps.
+        
         Args:
             x_range (tuple, optional): Range for x values as (min, max). Defaults to (20000, 1000000).
             y_range (tuple, optional): Range for y values as (min, max). Defaults to (20000, 1000000).
             step (int, optional): Step size for iterations. Defaults to 10000.
             visualize (bool, optional): Whether to generate visualization. Defaults to False.
+            workers (int, optional): Number of processes sharing the sweep; 1 computes in
+                this process, None uses every core. Only used by the exhaustive method. Defaults to 1.
+            method (str, optional): 'exhaustive' or 'adaptive'. Defaults to 'exhaustive'.
             
         Returns:
-            tuple: Optimal parameters as (x, y, value)
+            tuple: Optimal parameters as (x, y, value, x_count, y_count)
         """
-        max_value = [0, 0, 0]  # [x, y, value]
+        if method == 'adaptive':
+            result = self.adaptive_search(x_range, y_range, step)
+            if visualize:
+                self.visualize_results(list(zip(result['x'].tolist(), result['y'].tolist(), result['values'].tolist())))
+            return result['optimum']
+        if method != 'exhaustive':
+            raise ValueError(f"Unknown search method: {method}")
         
-        # Store all values for visualization
-        all_values = []
-        
-        for x in range(x_range[0], x_range[1] + 1, step):
-            for y in range(x + step, y_range[1] + 1, step):
-                value, x_count, y_count = self.find_value(x, y)
-                all_values.append((x, y, value))
-                if value > max_value[2]:
-                    max_value = [x, y, value, x_count, y_count]
+        surface = self.surface(x_range, y_range, step, workers)
         
         # Generate visualization if requested
         if visualize:
-            self.visualize_results(all_values)
+            x_values, y_values, values = surface.points()
+            self.visualize_results(list(zip(x_values.tolist(), y_values.tolist(), values.tolist())))
             
-        return tuple(max_value)
+        return surface.optimum()
     
     def visualize_results(self, values):
         """
@@ -144,6 +390,9 @@ class InvestmentAnalyzer:
         Args:
             values (list): List of tuples (x, y, value) containing parameter pairs and their expected values
         """
+        # Only this offline report needs matplotlib, so importing the analyzer does not load it
+        import matplotlib.pyplot as plt
+
         x_vals = [v[0] for v in values]
         y_vals = [v[1] for v in values]
         z_vals = [v[2] for v in values]
@@ -193,7 +442,7 @@ class InvestmentAnalyzer:
 # Example usage
 if __name__ == "__main__":
     # Create an instance of InvestmentAnalyzer
-    analyzer = InvestmentAnalyzer('test.csv', with_scam=False, stop_loss=0.3)
+    analyzer = InvestmentAnalyzer(sys.argv[1] if len(sys.argv) > 1 else 'data/test.csv', with_scam=False, stop_loss=0.3)
 
     # Find optimal parameters with visualization
     optimal_x, optimal_y, optimal_value, x_count, y_count = analyzer.find_optimal_parameters(
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import time
+from utils.dataset_cache import HASH_CHUNK_SIZE, clear_cache, remember_hash, stream_hash
+from utils import registry
+
+UPLOAD_DIR = os.path.join('data', '.uploads')
+MAX_UPLOAD_BYTES = 2 * 1024 ** 3
+STALE_TMP_SECONDS = 3600
+
+
+def save_upload(upload, upload_dir=UPLOAD_DIR, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Store an uploaded CSV file under its content hash and return its path.
+
+    The upload is read block by block twice: once to hash it, then, if no
+    upload with the same content is stored yet, to copy it to a temporary
+    file that is renamed into place. No copy of the whole upload is made in
+    memory, and re-uploading the same content returns the same path, whose
+    parsed arrays are then found in the dataset cache. Stored uploads are
+    evicted least recently used first beyond max_bytes.
+
+    Args:
+        upload (file): Binary file-like object, e.g. a Streamlit UploadedFile
+        upload_dir (str, optional): Directory holding the stored uploads. Defaults to UPLOAD_DIR.
+        max_bytes (int, optional): Size limit of the upload directory. Defaults to MAX_UPLOAD_BYTES.
+
+    Returns:
+        str: Path of the stored CSV file
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    upload.seek(0)
+    key = stream_hash(upload)
+    path = os.path.join(upload_dir, f"{key}.csv")
+
+    if os.path.exists(path):
+        # Mark the upload as recently used for eviction
+        os.utime(path)
+    else:
+        # Unique per call, as sessions are threads of one process; the '.tmp-' marker tells evict to skip it
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{key}.csv.tmp-", dir=upload_dir)
+        try:
+            upload.seek(0)
+            with os.fdopen(fd, 'wb') as f:
+                for block in iter(lambda: upload.read(HASH_CHUNK_SIZE), b''):
+                    f.write(block)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    remember_hash(path, key)
+
+    evict(upload_dir, max_bytes, keep=path)
+    return path
+
+
+def evict(upload_dir=UPLOAD_DIR, max_bytes=MAX_UPLOAD_BYTES, keep=None):
+    """
+    Delete the least recently used uploads until the directory fits in max_bytes.
+
+    Temporary files left behind by interrupted uploads are deleted too once
+    they are older than STALE_TMP_SECONDS. The cached parsed arrays and the
+    shared datasets of deleted uploads are dropped as well.
+
+    Args:
+        upload_dir (str, optional): Directory holding the stored uploads. Defaults to UPLOAD_DIR.
+        max_bytes (int, optional): Size limit of the upload directory. Defaults to MAX_UPLOAD_BYTES.
+        keep (str, optional): Path of an upload that must not be evicted. Defaults to None.
+
+    Returns:
+        list: Paths of the evicted uploads
+    """
+    uploads = []
+    now = time.time()
+    for entry in os.scandir(upload_dir):
+        if not entry.is_file():
+            continue
+        try:
+            stat = entry.stat()
+            if '.tmp-' in entry.name:
+                if now - stat.st_mtime > STALE_TMP_SECONDS:
+                    os.remove(entry.path)
+                continue
+        except FileNotFoundError:
+            # Renamed into place or removed by a concurrent upload
+            continue
+        uploads.append((stat.st_mtime, entry.path, stat.st_size))
+
+    total = sum(size for _, _, size in uploads)
+    evicted = []
+    for _, path, size in sorted(uploads):
+        if total <= max_bytes:
+            break
+        if keep is not None and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        clear_cache(path)
+        registry.evict(path)
+        os.remove(path)
+        total -= size
+        evicted.append(path)
+    return evicted
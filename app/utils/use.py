@@ -1,4 +1,9 @@
-from tim import InvestmentAnalyzer
+"""
+Print one expected value. Run from the app directory, as the modules are imported as utils.*:
+    python -m utils.use [CSV]   (defaults to data/test.csv)
+"""
+import sys
+from utils.tim import InvestmentAnalyzer
 
-analyser = InvestmentAnalyzer('test.csv', with_scam=True, stop_loss=0.3)
-print(analyser.find_value(540000, 990000))
\ No newline at end of file
+analyser = InvestmentAnalyzer(sys.argv[1] if len(sys.argv) > 1 else 'data/test.csv', with_scam=True, stop_loss=0.3)
+print(analyser.find_value(540000, 990000))
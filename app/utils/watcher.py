@@ -0,0 +1,311 @@
+import os
+import threading
+import time
+from utils.dataset_cache import file_fingerprint
+from utils.registry import get_dataset, peek
+from utils.tim import InvestmentAnalyzer
+
+POLL_INTERVAL = 1.0
+DEBOUNCE = 2.0
+MAX_DELAY = 10.0
+SUBSCRIBER_TIMEOUT = 30.0
+
+# (absolute path, memory_map) -> FileWatcher
+_watchers = {}
+_lock = threading.Lock()
+
+
+class FileWatcher:
+    """
+    Background thread refreshing the shared dataset of a CSV file when it changes.
+
+    The file is polled with os.stat, which works on every platform and
+    filesystem. A burst of writes is debounced: the refresh starts once the
+    file has been left alone for `debounce` seconds, or at the latest
+    `max_delay` seconds after the first unseen change when it keeps being
+    written to. The refresh goes through the registry (incrementally when
+    enabled), then recomputes in the same thread the cached results the
+    previous dataset held, so reruns find them ready instead of blocking.
+
+    Sessions using the watcher subscribe to it and renew their subscription
+    while they are open; once every subscriber unsubscribed or was not
+    renewed for SUBSCRIBER_TIMEOUT seconds, the watcher stops itself.
+    """
+
+    def __init__(self, file_path, memory_map=False, incremental=True, poll_interval=POLL_INTERVAL,
+                 debounce=DEBOUNCE, max_delay=MAX_DELAY):
+        """
+        Initialize a watcher; call start() to begin polling.
+
+        Args:
+            file_path (str): Path to the CSV file
+            memory_map (bool, optional): Whether the dataset is memory-mapped. Defaults to False.
+            incremental (bool, optional): Whether to only read appended rows. Defaults to True.
+            poll_interval (float, optional): Seconds between two checks of the file. Defaults to POLL_INTERVAL.
+            debounce (float, optional): Seconds without writes before refreshing. Defaults to DEBOUNCE.
+            max_delay (float, optional): Longest wait for writes to settle, in seconds. Defaults to MAX_DELAY.
+        """
+        self.file_path = file_path
+        self.memory_map = memory_map
+        self.key = (os.path.abspath(file_path), memory_map)
+        self.incremental = incremental
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.version = 0
+        self.last_refresh = None
+        self.last_error = None
+        self._loaded = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # subscriber -> time.monotonic() of its last renewal
+        self._subscribers = {}
+
+    def start(self):
+        """
+        Start polling in a daemon thread, unless it is already running.
+
+        The registered dataset is brought up to date first, so changes made
+        while the file was not watched are not left for the next change.
+        """
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop.clear()
+            # Taken before loading: a change made meanwhile is picked up by the first poll
+            fingerprint = self._fingerprint()
+            get_dataset(self.file_path, memory_map=self.memory_map, incremental=self.incremental)
+            self._loaded = fingerprint
+            self._thread = threading.Thread(target=self._run, name=f"watch-{os.path.basename(self.file_path)}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop polling.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the thread to end. Defaults to None (no limit).
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def subscribe(self, subscriber):
+        """
+        Subscribe to the watcher, or renew a subscription.
+
+        Must be called with the watcher lock held.
+
+        Args:
+            subscriber (str): Identifier of the subscriber, e.g. a session id
+        """
+        self._subscribers[subscriber] = time.monotonic()
+
+    def expire_subscribers(self, now=None):
+        """
+        Drop the subscriptions not renewed for SUBSCRIBER_TIMEOUT seconds.
+
+        Must be called with the watcher lock held.
+
+        Args:
+            now (float, optional): Current time.monotonic(). Defaults to now.
+
+        Returns:
+            bool: Whether the watcher had subscribers and has none left
+        """
+        if not self._subscribers:
+            return False
+        now = time.monotonic() if now is None else now
+        for subscriber, renewed in list(self._subscribers.items()):
+            if now - renewed > SUBSCRIBER_TIMEOUT:
+                del self._subscribers[subscriber]
+        return not self._subscribers
+
+    @property
+    def running(self):
+        """
+        bool: Whether the polling thread is alive.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def dataset(self):
+        """
+        Return the latest refreshed dataset without waiting for pending changes.
+
+        Returns:
+            Dataset: The shared dataset, loaded now if the registry does not hold it
+        """
+        dataset = peek(self.file_path, self.memory_map)
+        if dataset is None:
+            dataset = get_dataset(self.file_path, memory_map=self.memory_map, incremental=self.incremental)
+        return dataset
+
+    def refresh(self):
+        """
+        Refresh the shared dataset now and recompute the results cached for the previous one.
+
+        Returns:
+            Dataset: The refreshed dataset
+        """
+        previous = peek(self.file_path, self.memory_map)
+        dataset = get_dataset(self.file_path, memory_map=self.memory_map, incremental=self.incremental)
+        if previous is not None and dataset is not previous:
+            warm_caches(previous, dataset)
+        self.version += 1
+        self.last_refresh = time.time()
+        return dataset
+
+    def _fingerprint(self):
+        try:
+            return file_fingerprint(self.file_path)
+        except OSError:
+            # Being replaced: wait for the new file
+            return None
+
+    def _run(self):
+        seen = self._loaded
+        changed_at = first_change = None
+        while not self._stop.wait(self.poll_interval):
+            with _lock:
+                if self.expire_subscribers():
+                    # No session uses the file any more
+                    if _watchers.get(self.key) is self:
+                        del _watchers[self.key]
+                    self._stop.set()
+                    return
+            fingerprint = self._fingerprint()
+            now = time.monotonic()
+            if fingerprint != seen:
+                seen = fingerprint
+                changed_at = now
+                first_change = first_change or now
+            if fingerprint is None or fingerprint == self._loaded:
+                first_change = None
+                continue
+            if now - changed_at < self.debounce and now - first_change < self.max_delay:
+                continue
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                # Keep serving the previous data and retry on the next change
+                self.last_error = e
+            self._loaded = fingerprint
+            first_change = None
+
+
+def watch_file(file_path, memory_map=False, incremental=True, subscriber=None):
+    """
+    Return the running process-wide watcher of a file, starting it if needed.
+
+    Args:
+        file_path (str): Path to the CSV file
+        memory_map (bool, optional): Whether the dataset is memory-mapped. Defaults to False.
+        incremental (bool, optional): Whether to only read appended rows. Defaults to True.
+        subscriber (str, optional): Subscribe it to the watcher (see renew_watch). Without
+            subscribers the watcher runs until stop_watching. Defaults to None.
+
+    Returns:
+        FileWatcher: The watcher shared by every session
+    """
+    key = (os.path.abspath(file_path), memory_map)
+    with _lock:
+        watcher = _watchers.get(key)
+        if watcher is None:
+            watcher = _watchers[key] = FileWatcher(file_path, memory_map=memory_map, incremental=incremental)
+        watcher.incremental = incremental
+        if subscriber is not None:
+            watcher.subscribe(subscriber)
+    # Started outside the lock: bringing the dataset up to date may load the file
+    watcher.start()
+    return watcher
+
+
+def renew_watch(watcher, subscriber):
+    """
+    Renew a subscription so the watcher keeps running.
+
+    Args:
+        watcher (FileWatcher): Watcher returned by watch_file
+        subscriber (str): Identifier passed to watch_file
+    """
+    with _lock:
+        if _watchers.get(watcher.key) is watcher:
+            watcher.subscribe(subscriber)
+
+
+def unwatch(file_path, memory_map, subscriber):
+    """
+    Unsubscribe from the watcher of a file, stopping it when no subscriber is left.
+
+    Args:
+        file_path (str): Path to the CSV file
+        memory_map (bool): Whether the dataset is memory-mapped
+        subscriber (str): Identifier passed to watch_file
+    """
+    key = (os.path.abspath(file_path), memory_map)
+    with _lock:
+        watcher = _watchers.get(key)
+        if watcher is None:
+            return
+        watcher._subscribers.pop(subscriber, None)
+        if watcher._subscribers:
+            return
+        del _watchers[key]
+    watcher.stop()
+
+
+def stop_watching(file_path=None):
+    """
+    Stop watchers.
+
+    Args:
+        file_path (str, optional): Only stop the watchers of this file. Defaults to None (all).
+    """
+    path = os.path.abspath(file_path) if file_path is not None else None
+    with _lock:
+        for key in [key for key in _watchers if path is None or key[0] == path]:
+            _watchers.pop(key).stop()
+
+
+def warm_caches(previous, dataset):
+    """
+    Recompute on a new dataset the results that were cached for the previous one.
+
+    The survival indexes, the summary, the histograms and the optimization
+    grids and searches held by previous are rebuilt, most recently used
+    first. Histograms over the previous data's full range are rebuilt over
+    the new range. Survival indexes carried over by an incremental refresh
+    are already up to date and are skipped.
+
+    Args:
+        previous (Dataset): Dataset that was replaced
+        dataset (Dataset): Refreshed dataset of the same file
+    """
+    for key in previous.survival_cache.keys():
+        step, (start, stop), with_scam = key
+        dataset.survival_index(start, stop, step, with_scam)
+
+    old_summary = previous._summary
+    if old_summary is not None and dataset.summary.count:
+        summary = dataset.summary
+        for bins, (low, high), scale in reversed(previous.histogram_cache.keys()):
+            if low == old_summary.min:
+                low = summary.min
+            elif scale == 'log' and low == max(old_summary.min, 1):
+                low = max(summary.min, 1)
+            if high == old_summary.max:
+                high = summary.max
+            if high > low:
+                dataset.histogram(bins, (low, high), scale)
+
+    for key in reversed(previous.grid_cache.keys()):
+        if key[0] == 'adaptive':
+            _, x_range, y_range, step, top_k, stop_loss, with_scam = key
+            analyzer = InvestmentAnalyzer(dataset.file_path, stop_loss=stop_loss, with_scam=with_scam, dataset=dataset)
+            analyzer.adaptive_search(x_range, y_range, step, top_k=top_k)
+        else:
+            x_range, y_range, step, stop_loss, with_scam = key
+            analyzer = InvestmentAnalyzer(dataset.file_path, stop_loss=stop_loss, with_scam=with_scam, dataset=dataset)
+            analyzer.evaluate_grid(x_range, y_range, step)
@@ -0,0 +1,77 @@
+"""
+Compare the adaptive optimizer with the exhaustive grid search.
+
+For every dataset, scam setting, stop loss and step, both searches are run
+and their optima, evaluation counts and timings are printed. The script
+exits with status 1 if any optimum differs.
+
+Usage (from the repository root):
+    python benchmarks/adaptive_search.py [CSV ...] [--steps 10000 5000 2000 1000]
+                                         [--rows 100000] [--seeds 0 1 2]
+
+Without CSV files, synthetic datasets of --rows rows are generated, one per
+seed, and kept in benchmarks/data like those of hot_paths.py.
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, '..', 'app'))
+
+from generate_dataset import dataset_path  # noqa: E402
+from utils.dataset import Dataset  # noqa: E402
+from utils.tim import InvestmentAnalyzer  # noqa: E402
+
+DATA_DIR = os.path.join(BENCHMARK_DIR, 'data')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('datasets', nargs='*', help='CSV files to search (default: generated datasets)')
+    parser.add_argument('--x-range', type=int, nargs=2, default=(20000, 1000000), metavar=('MIN', 'MAX'))
+    parser.add_argument('--y-range', type=int, nargs=2, default=(20000, 1000000), metavar=('MIN', 'MAX'))
+    parser.add_argument('--steps', type=int, nargs='+', default=[10000, 5000, 2000, 1000])
+    parser.add_argument('--stop-losses', type=float, nargs='+', default=[0.0, 0.3, 0.6])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000], help='rows of the generated datasets')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2], help='seeds of the generated datasets')
+    args = parser.parse_args()
+    if not args.datasets:
+        args.datasets = [dataset_path(DATA_DIR, rows, seed) for rows in args.rows for seed in args.seeds]
+    return args
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    args = parse_args()
+    mismatches = 0
+    print(f"{'dataset':<20} {'scam':<5} {'stop':>5} {'step':>7} {'exhaustive':>12} {'adaptive':>10} "
+          f"{'ratio':>7} {'t_exh (s)':>10} {'t_ada (s)':>10}  optimum")
+    for path in args.datasets:
+        dataset = Dataset.load(path)
+        for with_scam in (False, True):
+            for stop_loss in args.stop_losses:
+                analyzer = InvestmentAnalyzer(path, stop_loss=stop_loss, with_scam=with_scam, dataset=dataset)
+                for step in args.steps:
+                    search = dict(x_range=tuple(args.x_range), y_range=tuple(args.y_range), step=step)
+                    exhaustive, exhaustive_time = timed(analyzer.find_optimal_parameters, **search)
+                    adaptive, adaptive_time = timed(analyzer.adaptive_search, **search)
+                    optimum = adaptive['optimum']
+                    note = '' if optimum == exhaustive else f" != adaptive {optimum[:3]}"
+                    mismatches += optimum != exhaustive
+                    print(f"{os.path.basename(path):<20} {str(with_scam):<5} {stop_loss:>5} {step:>7} "
+                          f"{adaptive['exhaustive_evaluations']:>12,} {adaptive['evaluations']:>10,} "
+                          f"{adaptive['evaluations'] / max(adaptive['exhaustive_evaluations'], 1):>7.2%} "
+                          f"{exhaustive_time:>10.3f} {adaptive_time:>10.3f}  {exhaustive[:3]}{note}")
+    print(f"{mismatches} mismatching optima")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
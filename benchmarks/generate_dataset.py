@@ -0,0 +1,154 @@
+"""
+Write synthetic `;`-delimited datasets with the layout the dashboard reads.
+
+Column 2 holds heavy-tailed integer values (a lognormal body with a Pareto
+tail, like token market caps) and column 17 the "True"/"False" scam flag;
+scam entries are skewed towards small values. Like real exports, the file
+starts with a header row and contains a few junk rows the loader skips.
+The other columns are filler so that rows have a realistic width.
+
+Usage (from the repository root):
+    python benchmarks/generate_dataset.py OUT.csv --rows 1000000 [--seed 0]
+"""
+import argparse
+import os
+import sys
+import numpy as np
+
+N_COLUMNS = 20
+VALUE_COLUMN = 2
+SCAM_COLUMN = 17
+CHUNK_ROWS = 500000
+SCAM_SHARE = 0.25
+TAIL_SHARE = 0.05
+TAIL_ALPHA = 1.1
+JUNK_SHARE = 0.0005
+
+
+def generate_values(rng, n, tail_share=TAIL_SHARE, tail_alpha=TAIL_ALPHA):
+    """
+    Draw heavy-tailed positive integer values.
+
+    Args:
+        rng (np.random.Generator): Random generator
+        n (int): Number of values
+        tail_share (float, optional): Fraction of values drawn from the Pareto tail. Defaults to TAIL_SHARE.
+        tail_alpha (float, optional): Pareto shape of the tail. Defaults to TAIL_ALPHA.
+
+    Returns:
+        np.ndarray: int64 values
+    """
+    values = rng.lognormal(mean=10.5, sigma=1.2, size=n)
+    tail = rng.random(n) < tail_share
+    values[tail] = 200000 * (1 + rng.pareto(tail_alpha, size=int(tail.sum())))
+    return np.minimum(values, 1e12).astype(np.int64) + 1
+
+
+def generate_scams(rng, values, scam_share=SCAM_SHARE):
+    """
+    Draw scam flags, more likely for small values.
+
+    Args:
+        rng (np.random.Generator): Random generator
+        values (np.ndarray): Values of the rows
+        scam_share (float, optional): Expected fraction of scam rows. Defaults to SCAM_SHARE.
+
+    Returns:
+        np.ndarray: bool scam flags
+    """
+    weight = 1 / np.log10(values + 10)
+    probability = np.clip(weight * scam_share / weight.mean(), 0, 1)
+    return rng.random(len(values)) < probability
+
+
+def format_rows(rng, values, scams, first_row):
+    """
+    Format rows as `;`-delimited lines.
+
+    Args:
+        rng (np.random.Generator): Random generator
+        values (np.ndarray): Values of the rows
+        scams (np.ndarray): Scam flags of the rows
+        first_row (int): Number of the first row, used for the id column
+
+    Returns:
+        str: The lines, each ending with a newline
+    """
+    ids = np.arange(first_row, first_row + len(values)).astype(str).astype(object)
+    volumes = rng.integers(0, 10000, len(values)).astype(str).astype(object)
+    # Columns 0-3 vary, 4-16 and 18-19 are filler
+    middle = ';' + ';'.join(['x'] * (SCAM_COLUMN - 4)) + ';'
+    end = ';' + ';'.join(['x'] * (N_COLUMNS - SCAM_COLUMN - 1))
+    lines = (
+        ids + ';token' + ids + ';' + values.astype(str).astype(object) + ';' + volumes
+        + middle + np.where(scams, 'True', 'False').astype(object) + end
+    )
+    junk = rng.random(len(values)) < JUNK_SHARE
+    # Invalid value or truncated line, as found in real exports
+    lines[junk] = np.where(rng.random(int(junk.sum())) < 0.5, 'n/a;n/a;n/a;', 'truncated;line')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_csv(path, rows, seed=0, chunk_rows=CHUNK_ROWS):
+    """
+    Write a synthetic dataset, chunk by chunk.
+
+    Args:
+        path (str): Output CSV file
+        rows (int): Number of data rows
+        seed (int, optional): Random seed; the same seed gives the same file. Defaults to 0.
+        chunk_rows (int, optional): Rows generated in memory at once. Defaults to CHUNK_ROWS.
+
+    Returns:
+        str: path
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='latin-1', newline='') as f:
+        header = [f"col{i}" for i in range(N_COLUMNS)]
+        header[VALUE_COLUMN] = 'value'
+        header[SCAM_COLUMN] = 'scam'
+        f.write(';'.join(header) + '\n')
+        for start in range(0, rows, chunk_rows):
+            values = generate_values(rng, min(chunk_rows, rows - start))
+            f.write(format_rows(rng, values, generate_scams(rng, values), start))
+    os.replace(tmp_path, path)
+    return path
+
+
+def dataset_path(directory, rows, seed=0):
+    """
+    Return the path of a generated dataset, generating it if it does not exist.
+
+    Args:
+        directory (str): Directory holding the generated datasets
+        rows (int): Number of data rows
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        str: Path of the CSV file
+    """
+    path = os.path.join(directory, f"synthetic_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        generate_csv(path, rows, seed)
+    return path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output', help='CSV file to write')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    generate_csv(args.output, args.rows, args.seed)
+    print(f"Wrote {args.rows:,} rows to {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,382 @@
+"""
+Time the dashboard's hot paths on synthetic datasets and compare them with a baseline.
+
+Once per run, in a fresh interpreter:
+    cold_import         import the headless analyzer (utils.tim) or the dashboard modules (app)
+For every dataset size, the scenarios are:
+    cold_load           fresh interpreter: import the analyzer and load the dataset from the on-disk cache
+    load_csv            parse the CSV file (load_csv_data, no cache)
+    load_cached         load the parsed arrays from the on-disk cache
+    load_mmap           memory-map the parsed arrays from the on-disk cache
+    find_rate           answer random find_rate queries
+    optimize            find_optimal_parameters, exhaustive, per grid step
+    optimize_adaptive   find_optimal_parameters, adaptive, per grid step
+    visualize_results   matplotlib figures of the grid, per grid step (small grids only)
+    tabs_render         first render of every tab, then a rerun (needs streamlit.testing)
+    tabs_heatmap        heatmap and 3D plot buttons of the Visualizations tab
+Result caches are cleared before each timed run, so every run does the full work.
+
+Results are written as JSON (--output). Given a previous output as --baseline,
+scenarios slower than the baseline by more than --tolerance are reported and
+the script exits with status 1.
+
+Usage (from the repository root):
+    python benchmarks/hot_paths.py [--rows 10000 100000 1000000] [--steps 10000 5000 1000]
+                                   [--output results.json] [--baseline baseline.json]
+
+Generated datasets are kept in benchmarks/data and reused by later runs.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(BENCHMARK_DIR, '..', 'app')
+sys.path.insert(0, APP_DIR)
+
+from generate_dataset import dataset_path  # noqa: E402
+from utils import registry  # noqa: E402
+from utils.dataset import Dataset  # noqa: E402
+from utils.dataset_cache import clear_cache  # noqa: E402
+from utils.tim import InvestmentAnalyzer  # noqa: E402
+
+DATA_DIR = os.path.join(BENCHMARK_DIR, 'data')
+X_RANGE = (20000, 1000000)
+Y_RANGE = (20000, 1000000)
+FIND_RATE_QUERIES = 10000
+MAX_VISUALIZE_POINTS = 50000
+MIN_REGRESSION_SECONDS = 0.001
+# Module imported by each cold_import run
+COLD_START_MODULES = {'analyzer': 'utils.tim', 'dashboard': 'app'}
+PLOTTING_MODULES = ('matplotlib', 'plotly.graph_objects', 'pandas')
+
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {app_dir!r})
+import {module}
+path = {path!r}
+if path:
+    from utils.dataset import Dataset
+    Dataset.load(path)
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+APP_SCRIPT = f"""
+import sys
+sys.path.insert(0, {os.path.abspath(APP_DIR)!r})
+import streamlit as st
+from tabs import create_tabs
+from utils.registry import get_dataset
+from utils.tim import InvestmentAnalyzer
+
+config = st.session_state['benchmark_config']
+dataset = get_dataset(config['file_path'])
+analyzer = InvestmentAnalyzer(
+    config['file_path'], stop_loss=config['stop_loss'], with_scam=config['with_scam'], dataset=dataset
+)
+create_tabs(analyzer, config)
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='dataset sizes, e.g. 10000 100000 1000000 10000000')
+    parser.add_argument('--steps', type=int, nargs='+', default=[10000, 5000, 1000], help='grid steps')
+    parser.add_argument('--scenarios', nargs='+', default=None, help='only run these scenarios')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per scenario; the minimum is compared')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown over the baseline')
+    return parser.parse_args()
+
+
+def timed(function, repeat, setup=None):
+    """
+    Time a function over several runs.
+
+    Args:
+        function (callable): Function to time
+        repeat (int): Number of timed runs
+        setup (callable, optional): Called untimed before each run. Defaults to None.
+
+    Returns:
+        list: Duration of each run in seconds
+    """
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def reset(dataset):
+    """
+    Drop every result cached on a dataset, so the next run recomputes it.
+
+    Args:
+        dataset (Dataset): The dataset
+    """
+    for cache in (dataset.survival_cache, dataset.value_cache, dataset.grid_cache, dataset.histogram_cache,
+                  dataset.filter_cache):
+        cache.clear()
+    dataset._summary = None
+
+
+def record(results, scenario, rows, durations, **params):
+    """
+    Store and print the timings of one scenario.
+
+    Args:
+        results (list): Results collected so far
+        scenario (str): Scenario name
+        rows (int): Dataset size
+        durations (list): Duration of each run in seconds
+        **params: Parameters distinguishing runs of the same scenario
+    """
+    result = {
+        'scenario': scenario,
+        'rows': rows,
+        'params': params,
+        'min_s': min(durations),
+        'median_s': statistics.median(durations),
+        'runs': len(durations)
+    }
+    results.append(result)
+    described = ' '.join(f"{name}={value}" for name, value in params.items())
+    print(f"{scenario:<18} {rows:>10,} {described:<22} {result['min_s']:>10.4f} {result['median_s']:>10.4f}")
+
+
+def cold_start(module, path=None):
+    """
+    Time an import, and optionally a cached dataset load, in a fresh interpreter.
+
+    Args:
+        module (str): Module to import
+        path (str, optional): CSV file loaded after the import. Defaults to None.
+
+    Returns:
+        tuple: (seconds from the first import to the end, heavy modules that got loaded)
+    """
+    script = COLD_START_SCRIPT.format(
+        app_dir=os.path.abspath(APP_DIR), module=module, path=path, heavy=PLOTTING_MODULES
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', script], cwd=APP_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result['elapsed'], result['loaded']
+
+
+def bench_cold_start(results, repeat, path=None, rows=0):
+    """
+    Record cold_import for every module of COLD_START_MODULES, or cold_load for one dataset.
+
+    Args:
+        results (list): Results collected so far
+        repeat (int): Number of timed runs
+        path (str, optional): CSV file of the cold_load scenario. Defaults to None.
+        rows (int, optional): Size of that dataset. Defaults to 0.
+    """
+    targets = {'analyzer': COLD_START_MODULES['analyzer']} if path else COLD_START_MODULES
+    for target, module in targets.items():
+        runs = [cold_start(module, path) for _ in range(repeat)]
+        record(results, 'cold_load' if path else 'cold_import', rows, [elapsed for elapsed, _ in runs], module=target)
+        loaded = runs[-1][1]
+        if target == 'analyzer' and loaded:
+            print(f"{'':<18} {'':>10} the analyzer loaded {', '.join(loaded)}")
+
+
+def bench_loading(results, path, rows, repeat):
+    clear_cache(path)
+    record(results, 'load_csv', rows, timed(lambda: InvestmentAnalyzer(path, use_cache=False), repeat))
+    Dataset.load(path)
+    record(results, 'load_cached', rows, timed(lambda: Dataset.load(path), repeat))
+    Dataset.load(path, memory_map=True)
+    record(results, 'load_mmap', rows, timed(lambda: Dataset.load(path, memory_map=True), repeat))
+
+
+def bench_find_rate(results, analyzer, rows, repeat, seed):
+    rng = np.random.default_rng(seed)
+    x = rng.integers(X_RANGE[0], X_RANGE[1], FIND_RATE_QUERIES)
+    y = x + rng.integers(1, Y_RANGE[1], FIND_RATE_QUERIES)
+    queries = list(zip(x.tolist(), y.tolist()))
+
+    def run():
+        for query in queries:
+            analyzer.find_rate(*query)
+    record(results, 'find_rate', rows, timed(run, repeat), queries=FIND_RATE_QUERIES)
+
+
+def bench_optimize(results, analyzer, rows, steps, repeat):
+    reset_analyzer = lambda: reset(analyzer.dataset)  # noqa: E731
+    for step in steps:
+        search = dict(x_range=X_RANGE, y_range=Y_RANGE, step=step)
+        for method, scenario in (('exhaustive', 'optimize'), ('adaptive', 'optimize_adaptive')):
+            durations = timed(lambda: analyzer.find_optimal_parameters(method=method, **search), repeat, reset_analyzer)
+            record(results, scenario, rows, durations, step=step)
+
+
+def bench_visualize(results, analyzer, rows, steps, repeat):
+    work_dir = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    # visualize_results saves its figure to the working directory
+    os.chdir(work_dir)
+    try:
+        for step in steps:
+            x_values, y_values, values = analyzer.surface(X_RANGE, Y_RANGE, step).points()
+            if len(values) > MAX_VISUALIZE_POINTS:
+                continue
+            points = list(zip(x_values.tolist(), y_values.tolist(), values.tolist()))
+
+            def run():
+                analyzer.visualize_results(points)
+                plt.close('all')
+            record(results, 'visualize_results', rows, timed(run, repeat), step=step)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_tabs(results, path, rows, step, repeat):
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print(f"{'tabs_render':<18} {rows:>10,} skipped: streamlit.testing is not available")
+        return
+    # The app's deprecation notices would drown the results
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    config = {
+        'file_path': path, 'memory_map': False, 'incremental': True, 'auto_refresh': False,
+        'stop_loss': 0.3, 'with_scam': False,
+        'x_min': X_RANGE[0], 'x_max': X_RANGE[1], 'y_min': Y_RANGE[0], 'y_max': Y_RANGE[1],
+        'step': step, 'search_method': 'exhaustive', 'workers': 1
+    }
+
+    def new_app():
+        app = AppTest.from_string(APP_SCRIPT, default_timeout=600)
+        app.session_state['benchmark_config'] = config
+        return app
+
+    def render():
+        app = new_app()
+        app.run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+        app.run()
+
+    def plots():
+        app = new_app()
+        app.run()
+        app.button(key='heatmap_button').click().run()
+        app.button(key='3d_button').click().run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+
+    def setup():
+        registry.evict(path)
+        reset(registry.get_dataset(path))
+    record(results, 'tabs_render', rows, timed(render, repeat, setup))
+    record(results, 'tabs_heatmap', rows, timed(plots, repeat, setup), step=step)
+
+
+def result_key(result):
+    return result['scenario'], result['rows'], json.dumps(result['params'], sort_keys=True)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print the slowdown of each scenario over a baseline.
+
+    Args:
+        results (list): Results of this run
+        baseline (list): Results of the baseline run
+        tolerance (float): Allowed relative slowdown
+
+    Returns:
+        int: Number of regressions
+    """
+    previous = {result_key(result): result for result in baseline}
+    regressions = 0
+    print(f"\n{'scenario':<18} {'rows':>10} {'params':<22} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for result in results:
+        base = previous.get(result_key(result))
+        if base is None:
+            continue
+        ratio = result['min_s'] / base['min_s'] if base['min_s'] else float('inf')
+        slower = result['min_s'] - base['min_s'] > MIN_REGRESSION_SECONDS
+        regression = ratio > 1 + tolerance and slower
+        regressions += regression
+        described = ' '.join(f"{name}={value}" for name, value in result['params'].items())
+        print(f"{result['scenario']:<18} {result['rows']:>10,} {described:<22} {base['min_s']:>10.4f} "
+              f"{result['min_s']:>10.4f} {ratio:>7.2f}{'  REGRESSION' if regression else ''}")
+    print(f"{regressions} regressions over {tolerance:.0%} tolerance")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    selected = lambda scenario: args.scenarios is None or scenario in args.scenarios  # noqa: E731
+    results = []
+    print(f"{'scenario':<18} {'rows':>10} {'params':<22} {'min (s)':>10} {'median (s)':>10}")
+    if selected('cold_import'):
+        bench_cold_start(results, args.repeat)
+    for rows in args.rows:
+        path = dataset_path(DATA_DIR, rows, args.seed)
+        if selected('cold_load'):
+            # Ensure the on-disk cache exists so that only the cached load is timed
+            Dataset.load(path)
+            bench_cold_start(results, args.repeat, path, rows)
+        if selected('load_csv') or selected('load_cached') or selected('load_mmap'):
+            bench_loading(results, path, rows, args.repeat)
+        analyzer = InvestmentAnalyzer(path, dataset=Dataset.load(path))
+        if selected('find_rate'):
+            bench_find_rate(results, analyzer, rows, args.repeat, args.seed)
+        if selected('optimize') or selected('optimize_adaptive'):
+            bench_optimize(results, analyzer, rows, args.steps, args.repeat)
+        if selected('visualize_results'):
+            bench_visualize(results, analyzer, rows, args.steps, args.repeat)
+        if selected('tabs_render') or selected('tabs_heatmap'):
+            bench_tabs(results, path, rows, max(args.steps), args.repeat)
+    if args.scenarios is not None:
+        results = [result for result in results if result['scenario'] in args.scenarios]
+
+    if args.output:
+        meta = {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpus': os.cpu_count(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        with open(args.output, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        return 1 if compare(results, baseline, args.tolerance) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
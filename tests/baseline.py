@@ -0,0 +1,16 @@
+"""The csv.reader loop the loader replaced, kept as the reference for its output."""
+import csv
+
+
+def load_csv_data(file_path):
+    data = []
+    with open(file_path, 'r', encoding='latin-1') as csv_file:
+        csv_reader = csv.reader(csv_file, delimiter=';')
+        for row in csv_reader:
+            try:
+                value = int(row[2])
+                scam = str(row[17]) == "True"
+                data.append((value, scam))
+            except (ValueError, IndexError):
+                continue
+    return data
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# The app imports its modules as utils.*, and the benchmarks generate the test data
+sys.path.insert(0, os.path.join(ROOT_DIR, 'app'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from generate_dataset import generate_csv  # noqa: E402
+
+ROWS = 20000
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """A generated dataset, with a header and junk rows, in its own directory."""
+    return generate_csv(str(tmp_path / 'data.csv'), ROWS, seed=0)
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pytest
+
+from utils import dataset as dataset_module
+from utils import dataset_cache
+from utils.dataset import Dataset
+
+
+def assert_same_data(a, b):
+    for name in ('values', 'scams', 'sorted_values', 'sorted_clean_values'):
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name))
+    assert a.dropped_rows == b.dropped_rows
+
+
+@pytest.fixture
+def no_parsing(monkeypatch):
+    """Make any CSV parse by Dataset.load fail the test."""
+    def parse(*args, **kwargs):
+        raise AssertionError("the CSV file was parsed")
+    monkeypatch.setattr(dataset_module, 'read_csv_columns', parse)
+
+
+def test_second_load_hits_the_cache(csv_path, request):
+    parsed = Dataset.load(csv_path)
+    request.getfixturevalue('no_parsing')
+    assert_same_data(Dataset.load(csv_path), parsed)
+    memory_mapped = Dataset.load(csv_path, memory_map=True)
+    assert isinstance(memory_mapped.values, np.memmap)
+    assert_same_data(memory_mapped, parsed)
+
+
+def test_touched_file_hits_the_cache(csv_path, request):
+    parsed = Dataset.load(csv_path)
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    request.getfixturevalue('no_parsing')
+    # Same content: found by its hash despite the new modification time
+    assert_same_data(Dataset.load(csv_path), parsed)
+
+
+def test_changed_file_is_parsed_again(csv_path):
+    Dataset.load(csv_path)
+    with open(csv_path, 'r+', encoding='latin-1') as f:
+        lines = f.readlines()
+        lines[1], lines[2] = lines[2], lines[1]
+        f.seek(0)
+        f.writelines(lines)
+    assert_same_data(Dataset.load(csv_path), Dataset.load(csv_path, use_cache=False))
+
+
+def test_cleared_cache_is_parsed_again(csv_path, monkeypatch):
+    Dataset.load(csv_path)
+    dataset_cache.clear_cache(csv_path)
+    assert dataset_cache.load_dataset(csv_path) is None
+    calls = []
+    parse = dataset_module.read_csv_columns
+    monkeypatch.setattr(dataset_module, 'read_csv_columns', lambda *a, **k: calls.append(a) or parse(*a, **k))
+    Dataset.load(csv_path)
+    assert len(calls) == 1
+
+
+def test_one_content_hash_kept_per_file(csv_path):
+    first = dataset_cache.content_hash(csv_path)
+    assert dataset_cache.content_hash(csv_path) == first
+    for _ in range(3):
+        with open(csv_path, 'a', encoding='latin-1') as f:
+            f.write("1;a;100" + ";x" * 14 + ";True\n")
+        assert dataset_cache.content_hash(csv_path) != first
+    path = os.path.abspath(csv_path)
+    assert [key for key in dataset_cache._content_hashes if key == path] == [path]
+    Dataset.load(csv_path)
+    dataset_cache.clear_cache(csv_path)
+    assert path not in dataset_cache._content_hashes
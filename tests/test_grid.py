@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from utils.dataset import Dataset
+from utils.tim import InvestmentAnalyzer
+
+X_RANGE = (20000, 1000000)
+Y_RANGE = (20000, 1000000)
+
+
+@pytest.fixture
+def dataset(csv_path):
+    return Dataset.load(csv_path, use_cache=False)
+
+
+@pytest.mark.parametrize('with_scam', [False, True])
+@pytest.mark.parametrize('step', [10000, 3000])
+def test_parallel_grid_equals_serial(csv_path, dataset, with_scam, step):
+    analyzer = InvestmentAnalyzer(csv_path, stop_loss=0.3, with_scam=with_scam, dataset=dataset)
+    serial = analyzer.compute_grid(X_RANGE, Y_RANGE, step, workers=1)
+    parallel = analyzer.compute_grid(X_RANGE, Y_RANGE, step, workers=2)
+    for a, b in zip(serial, parallel):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_parallel_optimum_equals_serial(csv_path, dataset):
+    analyzer = InvestmentAnalyzer(csv_path, dataset=dataset)
+    serial = analyzer.find_optimal_parameters(X_RANGE, Y_RANGE, 5000, workers=1)
+    # The grid is cached on the dataset whatever the number of workers
+    dataset.grid_cache.clear()
+    assert analyzer.find_optimal_parameters(X_RANGE, Y_RANGE, 5000, workers=2) == serial
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from utils.dataset import Dataset
+from utils.tim import InvestmentAnalyzer
+
+
+def split_file(csv_path):
+    """Truncate the file after about half its lines and return the removed lines."""
+    with open(csv_path, 'rb') as f:
+        content = f.read()
+    middle = content.index(b'\n', len(content) // 2) + 1
+    with open(csv_path, 'wb') as f:
+        f.write(content[:middle])
+    return content[middle:]
+
+
+def append(csv_path, content):
+    with open(csv_path, 'ab') as f:
+        f.write(content)
+
+
+def assert_same_data(a, b):
+    for name in ('values', 'scams', 'sorted_values', 'sorted_clean_values'):
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name))
+    assert a.dropped_rows == b.dropped_rows
+
+
+def test_appended_rows_match_full_reload(csv_path):
+    rest = split_file(csv_path)
+    dataset = Dataset.load(csv_path, use_cache=False)
+    assert dataset.load_appended() is dataset
+
+    append(csv_path, rest)
+    extended = dataset.load_appended()
+    assert extended is not dataset
+    assert_same_data(extended, Dataset.load(csv_path, use_cache=False))
+
+
+@pytest.mark.parametrize('use_cache', [False, True])
+def test_file_cut_mid_line(csv_path, use_cache):
+    rest = split_file(csv_path)
+    # The writer was interrupted inside the value of the next row
+    cut = rest.index(b';', rest.index(b';') + 1) + 3
+    append(csv_path, rest[:cut])
+    dataset = Dataset.load(csv_path, use_cache=use_cache)
+    assert dataset.load_appended() is dataset
+
+    append(csv_path, rest[cut:])
+    extended = dataset.load_appended()
+    assert_same_data(extended, Dataset.load(csv_path, use_cache=False))
+
+
+def test_survival_index_carried_over(csv_path):
+    rest = split_file(csv_path)
+    dataset = Dataset.load(csv_path, use_cache=False)
+    for with_scam in (False, True):
+        dataset.survival_index(20000, 1000000, 10000, with_scam)
+
+    append(csv_path, rest)
+    extended = dataset.load_appended()
+    reloaded = Dataset.load(csv_path, use_cache=False)
+    for with_scam in (False, True):
+        np.testing.assert_array_equal(
+            extended.survival_index(20000, 1000000, 10000, with_scam),
+            reloaded.survival_index(20000, 1000000, 10000, with_scam)
+        )
+    analyzer = InvestmentAnalyzer(csv_path, dataset=extended)
+    assert analyzer.find_optimal_parameters() == InvestmentAnalyzer(csv_path, dataset=reloaded).find_optimal_parameters()
+
+
+def test_rewritten_file_needs_full_reload(csv_path):
+    dataset = Dataset.load(csv_path, use_cache=False)
+    # Only the end of the parsed part is compared, so change a byte there
+    with open(csv_path, 'r+b') as f:
+        f.seek(-3, 2)
+        f.write(b'X')
+    assert dataset.load_appended() is None
+
+
+def test_survival_cache_is_bounded(csv_path):
+    dataset = Dataset.load(csv_path, use_cache=False)
+    base_bytes = dataset.nbytes
+    for step in range(1000, 1000 + 2 * dataset.survival_cache.maxsize):
+        dataset.survival_index(20000, 1000000, step, False)
+    assert len(dataset.survival_cache) == dataset.survival_cache.maxsize
+    assert dataset.nbytes == base_bytes + dataset.survival_cache.nbytes > base_bytes
@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+
+from utils.dataset import Dataset
+from utils.jobs import job_key, submit_optimization
+from utils.tim import InvestmentAnalyzer
+
+SEARCH = dict(x_range=(20000, 1000000), y_range=(20000, 1000000), step=5000)
+
+
+def wait(job, timeout=60):
+    deadline = time.time() + timeout
+    while not job.done and time.time() < deadline:
+        time.sleep(0.01)
+    return job.state
+
+
+def test_identical_requests_share_a_job(csv_path):
+    dataset = Dataset.load(csv_path, use_cache=False)
+    first = submit_optimization(InvestmentAnalyzer(csv_path, dataset=dataset), **SEARCH)
+    second = submit_optimization(InvestmentAnalyzer(csv_path, dataset=dataset), **SEARCH)
+    assert second is first and first.subscribers == 2
+    assert wait(first) == 'done'
+
+
+def test_reloaded_data_keeps_the_key_and_the_running_job(csv_path):
+    dataset = Dataset.load(csv_path, use_cache=False)
+    analyzer = InvestmentAnalyzer(csv_path, dataset=dataset)
+    job = submit_optimization(analyzer, **SEARCH)
+
+    refreshed = dataset.extended(np.array([500000], dtype=np.int64), np.array([False]))
+    refreshed_analyzer = InvestmentAnalyzer(csv_path, dataset=refreshed)
+    assert job_key(refreshed_analyzer, **SEARCH) == job.key
+    new_job = submit_optimization(refreshed_analyzer, **SEARCH)
+    # The new data gets its own job, and the old one finishes on its snapshot
+    assert new_job is not job
+    assert wait(job) == 'done' and wait(new_job) == 'done'
+    assert job.result['optimum'] == analyzer.find_optimal_parameters(**SEARCH)
+    assert new_job.result['optimum'] == refreshed_analyzer.find_optimal_parameters(**SEARCH)
@@ -0,0 +1,94 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from baseline import load_csv_data
+from utils.loader import iter_columns_chunked, iter_columns_rowwise, read_csv_columns
+
+EDGE_CASES = [
+    # Header, valid rows, a non-integer value and a truncated line
+    "id;name;value" + ";c" * 14 + ";scam\n"
+    "1;a;100" + ";x" * 14 + ";True\n"
+    "2;b;n/a" + ";x" * 14 + ";False\n"
+    "3;c;300\n"
+    "4;d;400" + ";x" * 14 + ";False;extra\n",
+    # A short first line, which the C parser sizes its columns from
+    "short;line\n"
+    "1;a;100" + ";x" * 14 + ";True\n"
+    "2;b;200" + ";x" * 14 + ";no\n",
+    # Empty scam fields next to missing ones
+    "1;a;100" + ";x" * 14 + ";\n"
+    "2;b;200" + ";x" * 14 + "\n"
+    "3;c;300" + ";x" * 14 + ";True\n",
+    # Blank lines and no newline at the end
+    "1;a;100" + ";x" * 14 + ";True\n"
+    "\n"
+    "2;b;-200" + ";x" * 14 + ";False",
+]
+
+
+def assert_matches_baseline(path, values, scams):
+    expected = load_csv_data(path)
+    assert values.dtype == np.int64 and scams.dtype == bool
+    assert values.tolist() == [value for value, _ in expected]
+    assert scams.tolist() == [scam for _, scam in expected]
+
+
+def test_generated_file_matches_baseline(csv_path):
+    values, scams, dropped_rows = read_csv_columns(csv_path, chunksize=3000)
+    assert_matches_baseline(csv_path, values, scams)
+    # The header and the junk rows
+    with open(csv_path, encoding='latin-1') as f:
+        assert dropped_rows == sum(1 for _ in f) - len(values)
+    assert dropped_rows > 1
+
+
+@pytest.mark.parametrize('content', EDGE_CASES)
+def test_edge_cases_match_baseline(tmp_path, content):
+    path = tmp_path / 'edge.csv'
+    path.write_text(content, encoding='latin-1')
+    values, scams, _ = read_csv_columns(str(path), chunksize=2)
+    assert_matches_baseline(str(path), values, scams)
+
+
+def test_int64_overflow_is_clipped(tmp_path):
+    path = tmp_path / 'overflow.csv'
+    path.write_text(
+        "id" + ";c" * 19 + "\n"
+        "1;a;" + "9" * 20 + ";x" * 14 + ";True\n"
+        "2;b;-" + "9" * 20 + ";x" * 14 + ";False\n"
+        "3;c;5" + ";x" * 14 + ";False\n",
+        encoding='latin-1'
+    )
+    with pytest.warns(RuntimeWarning, match='int64'):
+        values, scams, dropped_rows = read_csv_columns(str(path))
+    info = np.iinfo(np.int64)
+    assert values.tolist() == [info.max, info.min, 5]
+    assert scams.tolist() == [True, False, False]
+    assert dropped_rows == 1
+
+
+def test_valid_file_does_not_warn(csv_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        read_csv_columns(csv_path)
+
+
+def test_parsers_agree(csv_path):
+    chunked = [np.concatenate(column) for column in zip(*[chunk[:2] for chunk in iter_columns_chunked(csv_path, 4000)])]
+    rowwise = [np.concatenate(column) for column in zip(*[chunk[:2] for chunk in iter_columns_rowwise(csv_path, 4000)])]
+    for a, b in zip(chunked, rowwise):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_byte_ranges_cover_the_file(csv_path):
+    with open(csv_path, 'rb') as f:
+        content = f.read()
+    middle = content.index(b'\n', len(content) // 2) + 1
+    head = read_csv_columns(csv_path, byte_range=(0, middle))
+    tail = read_csv_columns(csv_path, byte_range=(middle, len(content)))
+    values, scams, dropped_rows = read_csv_columns(csv_path)
+    np.testing.assert_array_equal(np.concatenate((head[0], tail[0])), values)
+    np.testing.assert_array_equal(np.concatenate((head[1], tail[1])), scams)
+    assert head[2] + tail[2] == dropped_rows
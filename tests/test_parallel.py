@@ -0,0 +1,61 @@
+import os
+import signal
+import threading
+
+import numpy as np
+import pytest
+
+from utils import parallel
+from utils.dataset import Dataset
+from utils.tim import InvestmentAnalyzer
+
+X_RANGE = (20000, 1000000)
+Y_RANGE = (20000, 1000000)
+STEP = 5000
+
+
+@pytest.fixture
+def analyzer(csv_path):
+    return InvestmentAnalyzer(csv_path, dataset=Dataset.load(csv_path, use_cache=False))
+
+
+def assert_same_grid(a, b):
+    for x, y in zip(a, b):
+        np.testing.assert_array_equal(x, y)
+
+
+def test_concurrent_sweeps_with_different_worker_counts(analyzer):
+    serial = analyzer.compute_grid(X_RANGE, Y_RANGE, STEP)
+    results = {}
+    errors = []
+
+    def sweep(index, workers):
+        try:
+            for _ in range(3):
+                results[index] = analyzer.compute_grid(X_RANGE, Y_RANGE, STEP, workers=workers)
+        except Exception as e:
+            errors.append(e)
+
+    # Alternating pool sizes used to replace the pool under the other sweeps
+    threads = [threading.Thread(target=sweep, args=(index, 2 + index % 2)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    for grid in results.values():
+        assert_same_grid(grid, serial)
+    assert parallel.get_pool(2) is not parallel.get_pool(3)
+
+
+def test_sweep_recovers_from_a_dead_worker(analyzer):
+    serial = analyzer.compute_grid(X_RANGE, Y_RANGE, STEP)
+    analyzer.compute_grid(X_RANGE, Y_RANGE, STEP, workers=2)
+    pool = parallel.get_pool(2)
+    process = next(iter(pool._processes.values()))
+    os.kill(process.pid, signal.SIGKILL)
+    process.join()
+
+    assert_same_grid(analyzer.compute_grid(X_RANGE, Y_RANGE, STEP, workers=2), serial)
+    assert parallel.get_pool(2) is not pool
@@ -0,0 +1,41 @@
+import time
+
+from utils.dataset import Dataset
+from utils.jobs import submit_optimization
+from utils.perf import PerfRecorder, span
+from utils.tim import InvestmentAnalyzer
+
+
+def test_spans_nest_within_a_rerun():
+    recorder = PerfRecorder(log_path='')
+    with recorder.rerun():
+        with span("outer"):
+            with span("inner"):
+                pass
+    assert [(record['name'], record['depth']) for record in recorder.last_rerun] == [
+        ('rerun', 0), ('outer', 1), ('inner', 2)
+    ]
+    with span("outside"):
+        pass
+    assert 'outside' not in recorder.totals
+
+
+def test_job_spans_are_recorded(csv_path):
+    analyzer = InvestmentAnalyzer(csv_path, dataset=Dataset.load(csv_path, use_cache=False))
+    recorder = PerfRecorder(log_path='')
+    with recorder.rerun():
+        with span("tab_optimization"):
+            job = submit_optimization(analyzer, (20000, 1000000), (20000, 1000000), 5000)
+            # The rerun's own spans keep their depth while the job runs
+            with span("inner"):
+                pass
+    deadline = time.time() + 60
+    while not job.done and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.state == 'done'
+
+    assert recorder.totals['grid_sweep']['count'] == 1
+    with recorder.rerun():
+        pass
+    depths = {record['name']: record['depth'] for record in recorder.records}
+    assert depths['grid_sweep'] == 0 and depths['inner'] == 2
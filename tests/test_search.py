@@ -0,0 +1,22 @@
+import pytest
+
+from generate_dataset import generate_csv
+from utils.dataset import Dataset
+from utils.tim import InvestmentAnalyzer
+
+X_RANGE = (20000, 1000000)
+Y_RANGE = (20000, 1000000)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_adaptive_finds_the_exhaustive_optimum(tmp_path, seed):
+    path = generate_csv(str(tmp_path / f'data_{seed}.csv'), 20000, seed=seed)
+    dataset = Dataset.load(path, use_cache=False)
+    for with_scam in (False, True):
+        for stop_loss in (0.0, 0.3):
+            analyzer = InvestmentAnalyzer(path, stop_loss=stop_loss, with_scam=with_scam, dataset=dataset)
+            for step in (10000, 2000):
+                exhaustive = analyzer.find_optimal_parameters(X_RANGE, Y_RANGE, step)
+                adaptive = analyzer.adaptive_search(X_RANGE, Y_RANGE, step)
+                assert adaptive['optimum'] == exhaustive
+                assert adaptive['evaluations'] < adaptive['exhaustive_evaluations']
@@ -0,0 +1,29 @@
+import io
+import os
+import threading
+
+from utils.uploads import save_upload
+
+
+def test_concurrent_uploads_of_the_same_file(tmp_path):
+    content = ("1;a;100" + ";x" * 14 + ";True\n").encode('latin-1') * 20000
+    paths = []
+    errors = []
+
+    def upload():
+        try:
+            paths.append(save_upload(io.BytesIO(content), upload_dir=str(tmp_path)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=upload) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(set(paths)) == 1
+    assert os.listdir(tmp_path) == [os.path.basename(paths[0])]
+    with open(paths[0], 'rb') as f:
+        assert f.read() == content